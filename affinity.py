@@ -0,0 +1,129 @@
+"""
+Affinity mapping of the observations users type in the Empathize step.
+Notes are embedded once, when they are added, with the shared hashing vectorizer and grouped with
+spherical k-means in NiceGUI's process pool. A new note joins its nearest group at once; the background pass then
+refines the groups starting from the previous centroids instead of from scratch, so it usually
+settles in one or two iterations.
+"""
+
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+from nicegui import run
+
+from prompts import terms
+from vectors import DIMENSIONS, embed
+
+MAX_GROUPS = 8
+MAX_ITERATIONS = 20
+
+
+def group_count(notes: int, max_groups: int = MAX_GROUPS) -> int:
+    return max(1, min(max_groups, round(math.sqrt(2 * notes))))
+
+
+def seed_centroids(vectors: np.ndarray, centroids: Optional[np.ndarray], k: int) -> np.ndarray:
+    """Keep the previous centroids and add the notes least similar to all of them (farthest-point seeding)"""
+    if centroids is None or not len(centroids):
+        centroids = vectors[:1]
+    while len(centroids) < k:
+        closest = (vectors @ centroids.T).max(axis=1)
+        centroids = np.vstack([centroids, vectors[int(np.argmin(closest))]])
+    return centroids[:k]
+
+
+def kmeans(vectors: np.ndarray, centroids: np.ndarray, iterations: int = MAX_ITERATIONS):
+    """Spherical k-means; returns labels, centroids and the number of iterations run"""
+    labels = np.argmax(vectors @ centroids.T, axis=1)
+    for iteration in range(1, iterations + 1):
+        members = np.zeros((len(vectors), len(centroids)), dtype=vectors.dtype)
+        members[np.arange(len(vectors)), labels] = 1.0
+        sums = members.T @ vectors
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)  # empty groups keep theirs
+        updated = np.argmax(vectors @ centroids.T, axis=1)
+        if np.array_equal(updated, labels):
+            return labels, centroids, iteration
+        labels = updated
+    return labels, centroids, iterations
+
+
+def cluster_notes(vectors: np.ndarray, centroids: Optional[np.ndarray], max_groups: int = MAX_GROUPS):
+    """Worker entry point: cluster the note vectors, warm-started from `centroids`"""
+    labels, centroids, iterations = kmeans(vectors, seed_centroids(vectors, centroids,
+                                                                   group_count(len(vectors), max_groups)))
+    return labels.tolist(), centroids, iterations
+
+
+def top_terms(texts: List[str], count: int = 3) -> List[str]:
+    """Most frequent content words of a group of notes, used as its title"""
+    frequency = {}
+    for text in texts:
+        for word in terms(text):
+            frequency[word] = frequency.get(word, 0) + 1
+    return [word for word, _ in sorted(frequency.items(), key=lambda item: (-item[1], item[0]))[:count]]
+
+
+class AffinityMap:
+    """Groups of one session's notes, refined in the background as notes arrive"""
+
+    def __init__(self, max_groups: int = MAX_GROUPS):
+        self.max_groups = max_groups
+        self.notes: List[str] = []
+        self.labels: List[int] = []
+        self._vectors = np.zeros((0, DIMENSIONS), dtype=np.float32)  # rows of self.notes, grown by doubling
+        self.centroids: Optional[np.ndarray] = None
+        self.iterations = 0
+        self.running = False
+        self.dirty = False
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:len(self.notes)]
+
+    def add(self, note: str):
+        """Embed a note and place it in its nearest group right away"""
+        vector = embed(note)
+        if len(self.notes) == len(self._vectors):
+            self._vectors = np.vstack([self._vectors, np.zeros((max(len(self._vectors), 1), DIMENSIONS),
+                                                               dtype=np.float32)])
+        self._vectors[len(self.notes)] = vector
+        self.notes.append(note)
+        if self.centroids is None:
+            self.centroids = vector[None, :]
+            self.labels.append(0)
+        else:
+            self.labels.append(int(np.argmax(self.centroids @ vector)))
+
+    async def refresh(self) -> bool:
+        """Re-cluster in the worker pool until no notes arrived meanwhile; False if another call is at it"""
+        if self.running:
+            self.dirty = True
+            return False
+        self.running = True
+        try:
+            while True:
+                self.dirty = False
+                vectors = self.vectors.copy()  # add() writes into the buffer while the worker runs
+                if run.process_pool is not None:
+                    result = await run.cpu_bound(cluster_notes, vectors, self.centroids, self.max_groups)
+                else:  # no process pool outside a running app (scripts, benchmarks)
+                    result = await run.io_bound(cluster_notes, vectors, self.centroids, self.max_groups)
+                if result is None:  # cancelled or shutting down
+                    return False
+                labels, self.centroids, self.iterations = result
+                # notes added while the worker ran keep their provisional placement
+                self.labels[:len(labels)] = labels
+                if not self.dirty:
+                    return True
+        finally:
+            self.running = False
+
+    def groups(self) -> List[Tuple[str, List[str]]]:
+        """(title, notes) of every non-empty group, largest first"""
+        members = {}
+        for note, label in zip(self.notes, self.labels):
+            members.setdefault(label, []).append(note)
+        ordered = sorted(members.values(), key=len, reverse=True)
+        return [(' · '.join(top_terms(notes)) or 'Notes', notes) for notes in ordered]
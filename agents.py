@@ -0,0 +1,232 @@
+"""
+Agent backend for the design thinking personas.
+All personas share one pooled keep-alive HTTP client per worker; each persona has its own model,
+prompt, timeout and retry settings plus its own circuit breaker. The API is OpenAI-compatible
+(/v1/chat/completions). Without AGENT_BASE_URL the backend answers offline with canned replies.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from nicegui import app
+
+from metrics import Histogram, metrics
+from prompts import count_messages, count_tokens
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+class AgentError(Exception):
+    """The agent could not produce a reply"""
+
+
+class CircuitOpenError(AgentError):
+    """Calls to this agent are suspended after repeated failures"""
+
+
+@dataclass
+class AgentConfig:
+    persona: str
+    system_prompt: str = ''
+    model: str = 'gpt-4o-mini'
+    temperature: float = 0.7
+    max_tokens: int = 400
+    timeout: float = 20.0
+    retries: int = 2
+    backoff: float = 0.25  # base delay; attempt n waits up to backoff * 2**n (full jitter)
+    suggestions: List[str] = field(default_factory=list)  # used by the offline backend
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.reset_timeout else 'open'
+
+    def allow(self) -> bool:
+        """Closed circuits let calls through; a half-open one lets a single trial call decide"""
+        state = self.state
+        if state == 'half-open' and not self.probing:
+            self.probing = True
+            return True
+        return state == 'closed'
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            self.trips += 1
+        self.probing = False
+
+
+class AgentBackend:
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 max_connections: int = 100, max_keepalive: int = 20, keepalive_expiry: float = 30.0,
+                 offline_delay: float = 1.0):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                                   keepalive_expiry=keepalive_expiry)
+        self.offline_delay = offline_delay
+        self.configs: Dict[str, AgentConfig] = {}
+        self.overrides: Dict[str, dict] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latency: Dict[str, Histogram] = {}
+        self.tokens_in: Dict[str, Histogram] = {}
+        self.tokens_out: Dict[str, Histogram] = {}
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    def from_env(cls) -> 'AgentBackend':
+        """Configure from AGENT_BASE_URL, AGENT_API_KEY, AGENT_MAX_CONNECTIONS and AGENT_CONFIG (persona JSON)"""
+        backend = cls(base_url=os.environ.get('AGENT_BASE_URL') or None,
+                      api_key=os.environ.get('AGENT_API_KEY') or None,
+                      max_connections=int(os.environ.get('AGENT_MAX_CONNECTIONS', '100')))
+        path = os.environ.get('AGENT_CONFIG')
+        if path:
+            with open(path) as f:
+                backend.overrides = json.load(f)
+        return backend
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The worker's shared connection pool, created on first use"""
+        if self._client is None or self._client.is_closed:
+            headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
+            self._client = httpx.AsyncClient(base_url=self.base_url, limits=self.limits, headers=headers,
+                                             timeout=httpx.Timeout(20.0, connect=5.0))
+        return self._client
+
+    def configure(self, persona: str, **settings) -> AgentConfig:
+        """Register a persona; values from AGENT_CONFIG take precedence over the given defaults"""
+        config = self.configs.get(persona)
+        if config is None:
+            config = AgentConfig(persona, **{**settings, **self.overrides.get(persona, {})})
+            self.configs[persona] = config
+            self.breakers[persona] = CircuitBreaker()
+            self.latency[persona] = Histogram(len(metrics.buckets))
+            self.tokens_in[persona] = Histogram(len(TOKEN_BUCKETS))
+            self.tokens_out[persona] = Histogram(len(TOKEN_BUCKETS))
+            self.counts[persona] = {'requests': 0, 'retries': 0, 'failures': 0, 'rejected': 0}
+        return config
+
+    async def reply(self, persona: str, history: List[dict], **overrides) -> str:
+        """Ask a persona for the next assistant message given the chat history ([{'role', 'content'}]).
+
+        The persona's system prompt is prepended unless the history already starts with a system message.
+        """
+        config = self.configs.get(persona) or self.configure(persona)
+        if overrides:
+            config = replace(config, **overrides)
+        breaker = self.breakers[persona]
+        counts = self.counts[persona]
+        if not breaker.allow():
+            counts['rejected'] += 1
+            raise CircuitOpenError(f'{persona} is temporarily unavailable')
+        counts['requests'] += 1
+        if not history or history[0]['role'] != 'system':
+            history = [{'role': 'system', 'content': config.system_prompt}, *history]
+        start = time.perf_counter()
+        try:
+            text, usage = await (self.request(config, history) if self.base_url
+                                 else self.offline_reply(config, history))
+        except AgentError:
+            counts['failures'] += 1
+            breaker.record_failure()
+            raise
+        except asyncio.CancelledError:
+            breaker.probing = False  # a cancelled trial call says nothing about the backend
+            raise
+        breaker.record_success()
+        metrics.record(self.latency[persona], time.perf_counter() - start)
+        if metrics.enabled:
+            # the API's usage figures when it reports them, our estimate otherwise
+            metrics.record(self.tokens_in[persona], usage.get('prompt_tokens') or count_messages(history),
+                           TOKEN_BUCKETS)
+            metrics.record(self.tokens_out[persona], usage.get('completion_tokens') or count_tokens(text),
+                           TOKEN_BUCKETS)
+        return text
+
+    async def request(self, config: AgentConfig, history: List[dict]) -> Tuple[str, dict]:
+        """Reply text and token usage from the chat completions API"""
+        payload = {
+            'model': config.model,
+            'temperature': config.temperature,
+            'max_tokens': config.max_tokens,
+            'messages': history,
+        }
+        for attempt in range(config.retries + 1):
+            try:
+                response = await self.client.post('/v1/chat/completions', json=payload, timeout=config.timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    body = response.json()
+                    return body['choices'][0]['message']['content'], body.get('usage') or {}
+                error = AgentError(f'{config.persona}: HTTP {response.status_code}')
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                error = AgentError(f'{config.persona}: {type(e).__name__}')
+            except (httpx.HTTPStatusError, KeyError, IndexError, ValueError) as e:
+                raise AgentError(f'{config.persona}: bad response ({e})') from e
+            if attempt < config.retries:
+                self.counts[config.persona]['retries'] += 1
+                await asyncio.sleep(random.uniform(0, config.backoff * 2 ** attempt))
+        raise error
+
+    async def offline_reply(self, config: AgentConfig, history: List[dict]) -> Tuple[str, dict]:
+        await asyncio.sleep(self.offline_delay)
+        last = next((m['content'] for m in reversed(history) if m['role'] == 'user'), '')
+        suggestion = random.choice(config.suggestions) if config.suggestions else ''
+        return f'That\'s an interesting point about "{last}". Let me help you explore this further. {suggestion}', {}
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def collect(self):
+        yield from metrics.histogram_lines('app_agent_request_seconds', 'Successful agent reply latency',
+                                           'persona', self.latency)
+        yield from metrics.histogram_lines('app_agent_tokens_in', 'Prompt tokens sent per agent call',
+                                           'persona', self.tokens_in, TOKEN_BUCKETS)
+        yield from metrics.histogram_lines('app_agent_tokens_out', 'Completion tokens received per agent call',
+                                           'persona', self.tokens_out, TOKEN_BUCKETS)
+        yield '# HELP app_agent_calls_total Agent calls by outcome'
+        yield '# TYPE app_agent_calls_total counter'
+        for persona, counts in sorted(self.counts.items()):
+            for outcome, value in counts.items():
+                yield f'app_agent_calls_total{{persona="{persona}",outcome="{outcome}"}} {value}'
+        yield '# HELP app_agent_circuit_open Whether calls to the persona are suspended'
+        yield '# TYPE app_agent_circuit_open gauge'
+        for persona, breaker in sorted(self.breakers.items()):
+            yield f'app_agent_circuit_open{{persona="{persona}"}} {int(breaker.state == "open")}'
+
+    def install(self):
+        """Close the pool on shutdown and export agent metrics"""
+        app.on_shutdown(self.close)
+        metrics.add_collector(self.collect)
+        return self
+
+
+agent_backend = AgentBackend.from_env()
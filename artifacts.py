@@ -0,0 +1,349 @@
+"""
+Research artifacts attached in the chat: interview transcripts, CSV exports and PDFs.
+Uploads stream to disk in chunks as they arrive and are never held in memory. Each file is cut into
+byte ranges (page ranges for PDFs) that NiceGUI's process pool parses in parallel, and the passages
+go into an SQLite full-text index next to the files. Only WORKERS ranges are in flight per file, so
+memory stays bounded however large the file is; the in-memory SearchIndex would grow with it.
+Passages are searchable from the chat and can be cited into a message.
+"""
+
+import asyncio
+import csv
+import os
+import secrets
+import shutil
+import sqlite3
+import weakref
+from collections import deque
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import unquote
+
+import anyio
+from fastapi import HTTPException, Request
+from nicegui import app, background_tasks, run
+
+from metrics import metrics
+from search_index import SearchHit, tokenize
+
+UPLOAD_DIRECTORY = Path(os.environ.get('ARTIFACT_DIR', 'uploads'))
+SESSIONS = 'sessions'  # subdirectory of UPLOAD_DIRECTORY holding one directory per library; owned by this module
+MAX_UPLOAD_BYTES = int(os.environ.get('ARTIFACT_MAX_MB', '500')) * 2**20
+MAX_LIBRARY_BYTES = int(os.environ.get('ARTIFACT_SESSION_MAX_MB', '1000')) * 2**20  # all files of one session
+MAX_FILES = int(os.environ.get('ARTIFACT_MAX_FILES', '20'))  # per session
+UPLOAD_CHUNK = 2**20  # bytes buffered before each write to disk
+PARSE_RANGE = 4 * 2**20  # bytes of text or CSV per worker task
+PDF_PAGES = 20  # pages per worker task
+MAX_LINE = 2**20  # longer lines are cut, so a file without newlines cannot be read in one piece
+PASSAGE_CHARS = 600
+WORKERS = min(os.cpu_count() or 2, 8)  # worker tasks in flight per file
+
+KINDS = {'.txt': 'text', '.md': 'text', '.vtt': 'text', '.srt': 'text', '.csv': 'csv', '.tsv': 'csv', '.pdf': 'pdf'}
+UNITS = {'text': 'line', 'csv': 'row', 'pdf': 'p.'}
+ACCEPT = ','.join(KINDS)
+
+# A parsed passage as sent back by a worker: the unit (line, row or page) it starts on, relative to the range
+Passage = Tuple[int, str]
+
+
+def kind_of(name: str) -> Optional[str]:
+    return KINDS.get(Path(name).suffix.lower())
+
+
+def split_long(text: str, limit: int = PASSAGE_CHARS) -> Iterator[str]:
+    """Cut text into pieces of at most `limit` characters, at whitespace where possible"""
+    while len(text) > limit:
+        cut = text.rfind(' ', limit // 2, limit)
+        cut = cut if cut > 0 else limit
+        yield text[:cut]
+        text = text[cut:].lstrip()
+    if text:
+        yield text
+
+
+def read_lines(path: str, start: int, end: int) -> Iterator[bytes]:
+    """Lines starting in [start, end); the line running across `start` belongs to the previous range"""
+    with open(path, 'rb') as file:
+        if start:
+            file.seek(start - 1)
+            file.readline(MAX_LINE)
+        while file.tell() < end:
+            line = file.readline(MAX_LINE)
+            if not line:
+                break
+            yield line
+
+
+def text_passages(lines: Iterable[bytes]) -> Iterator[Tuple[int, str]]:
+    """Join lines into passages of up to PASSAGE_CHARS, breaking at blank lines (speaker turns, paragraphs)"""
+    buffer: List[str] = []
+    first = size = 0
+    for index, raw in enumerate(lines):
+        line = raw.decode('utf-8', errors='replace').strip()
+        if buffer and (not line or size + len(line) > PASSAGE_CHARS):
+            yield from ((first, piece) for piece in split_long(' '.join(buffer)))
+            buffer, size = [], 0
+        if line:
+            if not buffer:
+                first = index
+            buffer.append(line)
+            size += len(line) + 1
+    if buffer:
+        yield from ((first, piece) for piece in split_long(' '.join(buffer)))
+
+
+def csv_passages(lines: Iterable[bytes], header: List[str], delimiter: str) -> Iterator[Tuple[int, str]]:
+    """One passage per row, as `column: value` pairs, numbered by the line the row starts on"""
+    reader = csv.reader((line.decode('utf-8', errors='replace') for line in lines), delimiter=delimiter)
+    first = 0
+    for row in reader:
+        cells = [f'{name}: {" ".join(value.split())}' for name, value in zip(header, row) if value.strip()]
+        if cells:
+            yield first, next(split_long('; '.join(cells)))
+        first = reader.line_num
+
+
+def pdf_pages(path: str) -> int:
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise ValueError('reading PDFs needs the pypdf package') from e
+    return len(PdfReader(path).pages)
+
+
+def pdf_passages(path: str, start: int, end: int) -> Iterator[Tuple[int, str]]:
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    for number in range(start, end):
+        text = ' '.join((reader.pages[number].extract_text() or '').split())
+        yield from ((number - start, piece) for piece in split_long(text))
+
+
+def delimiter_of(path: str) -> str:
+    return '\t' if path.lower().endswith('.tsv') else ','
+
+
+def plan(path: str, kind: str) -> Tuple[List[Tuple[int, int]], List[str]]:
+    """Ranges to parse and, for CSV files, the header"""
+    if kind == 'pdf':
+        pages = pdf_pages(path)
+        return [(start, min(start + PDF_PAGES, pages)) for start in range(0, pages, PDF_PAGES)], []
+    header, body = [], 0
+    if kind == 'csv':
+        with open(path, 'rb') as file:
+            first = file.readline(MAX_LINE)
+        header = next(csv.reader([first.decode('utf-8-sig', errors='replace')], delimiter=delimiter_of(path)), [])
+        body = len(first)
+    size = os.path.getsize(path)
+    return [(start, min(start + PARSE_RANGE, size)) for start in range(body, size, PARSE_RANGE)], header
+
+
+def parse_range(path: str, kind: str, start: int, end: int, header: List[str]) -> Tuple[int, List[Passage]]:
+    """Worker entry point: parse one range into (units in the range, passages)"""
+    if kind == 'pdf':
+        return end - start, list(pdf_passages(path, start, end))
+    lines = list(read_lines(path, start, end))  # one range, plus the line running across its end
+    passages = csv_passages(lines, header, delimiter_of(path)) if kind == 'csv' else text_passages(lines)
+    return len(lines), list(passages)
+
+
+def match_query(query: str) -> str:
+    """Full-text query where every word must match and the last one is a prefix, as in SearchIndex"""
+    tokens = tokenize(query)
+    return ' '.join(f'"{token}"' for token in tokens) + '*' if tokens else ''
+
+
+@dataclass
+class Artifact:
+    id: int
+    name: str
+    kind: str
+    stage: int
+    path: Path
+    size: int = 0
+    parsed: int = 0  # ranges indexed
+    ranges: int = 0
+    passages: int = 0
+    status: str = 'uploading'  # uploading, indexing, ready or failed
+    error: str = ''
+
+    @property
+    def progress(self) -> float:
+        return self.parsed / self.ranges if self.ranges else 0.0
+
+
+class ArtifactLibrary:
+    """The research artifacts of one session, with a full-text index of their passages"""
+
+    def __init__(self, stage: Callable[[], int] = lambda: 0, max_results: int = 6,
+                 max_files: int = MAX_FILES, max_total_bytes: int = MAX_LIBRARY_BYTES):
+        self.token = secrets.token_urlsafe(16)
+        self.directory = UPLOAD_DIRECTORY / SESSIONS / self.token
+        self.database = self.directory / 'passages.db'
+        self.stage = stage
+        self.max_results = max_results
+        self.max_files = max_files
+        self.max_total_bytes = max_total_bytes
+        self.artifacts: List[Artifact] = []
+        self.change_handlers: List[Callable[[], None]] = []
+        self.writer: Optional[sqlite3.Connection] = None
+        self.write_lock = asyncio.Lock()
+        libraries[self.token] = self
+        weakref.finalize(self, shutil.rmtree, self.directory, True)
+
+    @property
+    def url(self) -> str:
+        return f'/artifacts/{self.token}'
+
+    def on_change(self, handler: Callable[[], None]):
+        self.change_handlers.append(handler)
+
+    def changed(self):
+        for handler in self.change_handlers:
+            handler()
+
+    async def receive(self, name: str, chunks: AsyncIterator[bytes], max_bytes: int = MAX_UPLOAD_BYTES) -> Artifact:
+        """Stream an upload to disk, then index it in the background"""
+        kind = kind_of(name)
+        if kind is None:
+            raise HTTPException(status_code=415, detail=f'Supported files: {ACCEPT}')
+        kept = [artifact for artifact in self.artifacts if artifact.status != 'failed']  # failed uploads are deleted
+        if len(kept) >= self.max_files:
+            raise HTTPException(status_code=413, detail=f'Sessions are limited to {self.max_files} files')
+        room = self.max_total_bytes - sum(artifact.size for artifact in kept)
+        if room < max_bytes:
+            max_bytes = room
+            limit = f'The files of a session are limited to {self.max_total_bytes // 2**20} MB'
+        else:
+            limit = f'Files are limited to {max_bytes // 2**20} MB'
+        number = len(self.artifacts) + 1
+        artifact = Artifact(number, name, kind, self.stage(), self.directory / f'{number}{Path(name).suffix.lower()}')
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.artifacts.append(artifact)
+        self.changed()
+        try:
+            buffer = bytearray()
+            async with await anyio.open_file(artifact.path, 'wb') as file:
+                async for chunk in chunks:
+                    artifact.size += len(chunk)
+                    if artifact.size > max_bytes:
+                        raise HTTPException(status_code=413, detail=limit)
+                    buffer += chunk
+                    if len(buffer) >= UPLOAD_CHUNK:
+                        await file.write(bytes(buffer))
+                        buffer.clear()
+                await file.write(bytes(buffer))
+        except BaseException as e:
+            artifact.status, artifact.error = 'failed', getattr(e, 'detail', None) or 'upload interrupted'
+            artifact.path.unlink(missing_ok=True)
+            self.changed()
+            raise
+        artifact.status = 'indexing'
+        self.changed()
+        background_tasks.create(self.ingest(artifact), name=f'ingest {name}')
+        return artifact
+
+    @staticmethod
+    async def in_worker(func, *args):
+        if run.process_pool is not None:
+            return await run.cpu_bound(func, *args)
+        return await run.io_bound(func, *args)  # no process pool outside a running app (scripts, benchmarks)
+
+    async def ingest(self, artifact: Artifact):
+        """Parse the ranges in the worker pool, WORKERS at a time, and index them in file order"""
+        path = str(artifact.path)
+        pending: deque = deque()
+        try:
+            planned = await self.in_worker(plan, path, artifact.kind)
+            if planned is None:  # cancelled or shutting down
+                return
+            ranges, header = planned
+            artifact.ranges = len(ranges)
+            base = 1 if artifact.kind == 'csv' else 0  # the header is row 1
+            for number, (start, end) in enumerate(ranges):
+                pending.append(asyncio.ensure_future(self.in_worker(parse_range, path, artifact.kind, start, end, header)))
+                while len(pending) >= WORKERS or (pending and number == len(ranges) - 1):
+                    result = await pending.popleft()
+                    if result is None:
+                        return
+                    units, passages = result
+                    await self.store(artifact, base, passages)
+                    base += units
+            artifact.status = 'ready'
+        except Exception as e:
+            artifact.status, artifact.error = 'failed', str(e) or type(e).__name__
+        finally:
+            for future in pending:
+                future.cancel()
+            self.changed()
+
+    async def store(self, artifact: Artifact, base: int, passages: List[Passage]):
+        """Add the passages of one parsed range to the full-text index"""
+        unit_name = UNITS[artifact.kind]
+        rows = [(text, f'{artifact.name} · {unit_name} {base + unit + 1}', artifact.stage) for unit, text in passages]
+        async with self.write_lock:
+            await run.io_bound(self.insert, rows)
+        artifact.passages += len(rows)
+        artifact.parsed += 1
+        self.changed()
+
+    def insert(self, rows: List[Tuple[str, str, int]]):
+        if self.writer is None:
+            self.writer = sqlite3.connect(self.database, check_same_thread=False)
+            self.writer.execute('PRAGMA journal_mode=WAL')  # searches read while ranges are written
+            self.writer.execute('PRAGMA synchronous=OFF')  # the index lives only as long as the session
+            self.writer.execute("CREATE VIRTUAL TABLE IF NOT EXISTS passages "
+                                "USING fts5(text, section UNINDEXED, stage UNINDEXED, prefix='2 3')")  # word being typed
+        with self.writer:
+            self.writer.executemany('INSERT INTO passages VALUES (?, ?, ?)', rows)
+
+    def search(self, query: str) -> List[SearchHit]:
+        """Best matching passages, best first; blocking, so call it through run.io_bound"""
+        match = match_query(query)
+        if not match or not self.database.exists():
+            return []
+        try:
+            with closing(sqlite3.connect(f'file:{self.database}?mode=ro', uri=True)) as connection:
+                rows = connection.execute('SELECT stage, section, text, rank FROM passages WHERE passages MATCH ? '
+                                          'ORDER BY rank LIMIT ?', (match, self.max_results)).fetchall()
+        except sqlite3.OperationalError:  # the first range is still being written
+            return []
+        return [SearchHit(stage, section, text, -rank) for stage, section, text, rank in rows]
+
+    def collect_stats(self) -> Dict[str, int]:
+        return {'files': len(self.artifacts), 'passages': sum(artifact.passages for artifact in self.artifacts),
+                'bytes': sum(artifact.size for artifact in self.artifacts)}
+
+
+libraries: 'weakref.WeakValueDictionary[str, ArtifactLibrary]' = weakref.WeakValueDictionary()
+
+
+def cite(hit: SearchHit) -> str:
+    """A passage quoted into a chat message with its source"""
+    return f'"{hit.text}" [{hit.section}]'
+
+
+def collect():
+    stats = [library.collect_stats() for library in list(libraries.values())]
+    for key, help_text in [('files', 'Research artifacts uploaded'), ('passages', 'Artifact passages indexed'),
+                           ('bytes', 'Bytes of research artifacts on disk')]:
+        yield f'# HELP app_artifact_{key} {help_text}'
+        yield f'# TYPE app_artifact_{key} gauge'
+        yield f'app_artifact_{key} {sum(entry[key] for entry in stats)}'
+
+
+def install():
+    """Serve the upload endpoint; uploads of earlier runs belonged to sessions that are gone"""
+    shutil.rmtree(UPLOAD_DIRECTORY / SESSIONS, ignore_errors=True)  # never the rest of ARTIFACT_DIR
+    metrics.add_collector(collect)
+
+    @app.post('/artifacts/{token}', include_in_schema=False)
+    async def upload(token: str, request: Request):
+        library = libraries.get(token)
+        if library is None:
+            raise HTTPException(status_code=404)
+        name = Path(unquote(request.headers.get('x-filename', ''))).name
+        artifact = await library.receive(name, request.stream())
+        return {'artifact': artifact.id}
@@ -0,0 +1,69 @@
+"""
+Load test of the agent backend layer against an agent API (normally benchmarks.mock_agent_server).
+
+Sends concurrent replies for all ten design thinking personas through the shared pool and reports
+latency percentiles, throughput, retries, failures and circuit breaker rejections.
+
+    python -m benchmarks.mock_agent_server --error-rate 0.05 &
+    python -m benchmarks.agent_bench --url http://localhost:8001 --concurrency 50 --requests 500
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from benchmarks import harness  # noqa: F401  (puts the repo root on sys.path)
+from agents import AgentBackend, AgentError
+from design_thinking_platform import DesignThinkingPlatform
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float('nan')
+
+
+async def main(url: str, concurrency: int, total: int, max_connections: int) -> int:
+    backend = AgentBackend(base_url=url, max_connections=max_connections)
+    steps = DesignThinkingPlatform().design_steps
+    for step in steps:
+        backend.configure(step.agent, system_prompt=f'You are the {step.agent} in a design thinking workshop.')
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(steps[i % len(steps)].agent)
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            persona = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                await backend.reply(persona, [{'role': 'user', 'content': 'How do we learn what users need?'}])
+                latencies.append(time.perf_counter() - start)
+            except AgentError:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await backend.close()
+
+    counts = {key: sum(c[key] for c in backend.counts.values()) for key in ('requests', 'retries', 'failures', 'rejected')}
+    print(f'{total} replies, concurrency {concurrency}, pool {max_connections}: {total / elapsed:.1f} replies/s')
+    print(f'latency p50 {percentile(latencies, 0.5) * 1000:.0f} ms, p95 {percentile(latencies, 0.95) * 1000:.0f} ms, '
+          f'p99 {percentile(latencies, 0.99) * 1000:.0f} ms')
+    print(f'errors {errors}, retries {counts["retries"]}, failures {counts["failures"]}, '
+          f'rejected by open circuits {counts["rejected"]}, '
+          f'circuit trips {sum(b.trips for b in backend.breakers.values())}')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8001', help='agent API base URL')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--max-connections', type=int, default=100, help='size of the shared connection pool')
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.url, args.concurrency, args.requests, args.max_connections)))
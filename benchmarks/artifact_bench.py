@@ -0,0 +1,120 @@
+"""
+Research artifact benchmark: stream a large interview transcript through upload and ingestion.
+
+Writes a synthetic transcript of --mb megabytes, feeds it to an ArtifactLibrary in 64 kB chunks as
+the upload endpoint would, and waits until every range is parsed and indexed. Reports upload and
+indexing throughput, the resident memory of this process while it runs (which stays bounded however
+large the file is) and the latency of searches over the indexed passages.
+
+    python -m benchmarks.artifact_bench --mb 200 --workers 4
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.harness import run
+from nicegui import run as nicegui_run
+
+import artifacts
+from artifacts import ArtifactLibrary
+
+SPEAKERS = ['Interviewer', 'P1', 'P2', 'P3']
+
+
+def rss_mb() -> float:
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+def vocabulary(size: int):
+    syllables = ['ka', 'lo', 'mi', 'ne', 'tu', 'ra', 'si', 'po', 'de', 'fa', 'gu', 'ze', 'bo', 'ti', 'wa']
+    return sorted({''.join(random.choices(syllables, k=random.randint(2, 4))) for _ in range(size)})
+
+
+def write_transcript(path: str, megabytes: int, words):
+    """Speaker turns with timestamps, written in pieces so the generator stays small too"""
+    second = 0
+    with open(path, 'w') as file:
+        while file.tell() < megabytes * 2**20:
+            lines = []
+            for _ in range(500):
+                second += random.randint(5, 40)
+                text = ' '.join(random.choices(words, k=random.randint(8, 60)))
+                lines.append(f'[{second // 3600:02}:{second // 60 % 60:02}:{second % 60:02}] '
+                             f'{random.choice(SPEAKERS)}: {text}\n\n')
+            file.write(''.join(lines))
+
+
+async def read_chunks(path: str, size: int = 64 * 1024):
+    with open(path, 'rb') as file:
+        while chunk := file.read(size):
+            yield chunk
+            await asyncio.sleep(0)
+
+
+async def main(megabytes: int, workers: int, words: int, queries: int, seed: int) -> int:
+    random.seed(seed)
+    if workers:
+        nicegui_run.process_pool = ProcessPoolExecutor(workers)
+        artifacts.WORKERS = workers
+    vocab = vocabulary(words)
+    with tempfile.TemporaryDirectory() as directory:
+        artifacts.UPLOAD_DIRECTORY = artifacts.Path(directory) / 'uploads'
+        source = os.path.join(directory, 'transcript.txt')
+        write_transcript(source, megabytes, vocab)
+        size = os.path.getsize(source)
+        library = ArtifactLibrary()
+        baseline = peak = rss_mb()
+
+        async def sample():
+            nonlocal peak
+            while True:
+                peak = max(peak, rss_mb())
+                await asyncio.sleep(0.05)
+
+        sampler = asyncio.create_task(sample())
+        start = time.perf_counter()
+        artifact = await library.receive('transcript.txt', read_chunks(source), max_bytes=size)
+        uploaded = time.perf_counter() - start
+        while artifact.status == 'indexing':
+            await asyncio.sleep(0.05)
+        indexed = time.perf_counter() - start
+        sampler.cancel()
+
+        latencies = []
+        for _ in range(queries):
+            first, second = random.sample(vocab, 2)
+            query = f'{first} {second[:random.randint(2, len(second))]}'
+            begin = time.perf_counter()
+            library.search(query)
+            latencies.append(time.perf_counter() - begin)
+        latencies.sort()
+
+        print(f'{size / 2**20:.0f} MB transcript, {artifact.passages} passages from {artifact.ranges} ranges, '
+              f'{workers or "thread"} workers, status {artifact.status} {artifact.error}')
+        print(f'upload: {uploaded:.1f} s ({size / 2**20 / uploaded:.0f} MB/s), '
+              f'indexed after {indexed:.1f} s ({size / 2**20 / indexed:.1f} MB/s)')
+        print(f'resident memory: {baseline:.0f} MB before, peak {peak:.0f} MB, {rss_mb():.0f} MB after; '
+              f'index {library.database.stat().st_size / 2**20:.0f} MB on disk')
+        print(f'search: p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, '
+              f'p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms')
+    if workers:
+        nicegui_run.process_pool.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mb', type=int, default=200, help='transcript size')
+    parser.add_argument('--workers', type=int, default=4, help='worker processes (0: threads)')
+    parser.add_argument('--words', type=int, default=20000, help='vocabulary size')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    sys.exit(run(lambda: main(args.mb, args.workers, args.words, args.queries, args.seed)))
@@ -0,0 +1,125 @@
+"""
+Ideation board benchmark: delta sync with many notes and concurrent editors.
+
+Builds a board with --notes sticky notes and --editors browser views (headless NiceGUI clients,
+each looking at its own 1200x800 part of the board), then simulates the editors dragging, voting,
+posting and scrolling for --seconds of board time. Reports the cost of a flush and the bytes each
+browser receives, compared with sending the whole board on every change.
+
+    python -m benchmarks.board_bench --notes 1000 --editors 30 --seconds 30
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from benchmarks.harness import run
+from nicegui.client import Client
+from nicegui.page import page
+
+from ideation import Board, BoardView
+
+VIEWPORT = (1200, 800)
+IDEAS = ['Focus timer', 'Ambient sounds', 'Status light', 'Team check-in bot', 'Quiet hours', 'Body doubling room',
+         'Weekly focus report', 'Notification digest', 'Desk buddy', 'Calendar blocks']
+
+
+def outbox_bytes(client: Client) -> int:
+    """Size of the queued messages as they would go over the websocket, then drop them"""
+    size = sum(len(json.dumps(data)) for _, _, data in client.outbox.messages)
+    client.outbox.messages.clear()
+    client.outbox.updates.clear()
+    return size
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+class Editor:
+    def __init__(self, board: Board, view: BoardView):
+        self.board = board
+        self.view = view
+        self.dragging = None
+        self.drag_until = 0.0
+        self.scroll(random.uniform(0, board.width - VIEWPORT[0]), random.uniform(0, board.height - VIEWPORT[1]))
+
+    def scroll(self, x: float, y: float):
+        self.x, self.y = x, y
+        self.board.set_viewport(self.view, (x, y, *VIEWPORT))
+
+    def step(self, now: float, interval: float):
+        """What this editor does during one flush interval"""
+        if self.dragging is not None:
+            note = self.board.notes[self.dragging]
+            self.board.move(note.id, note.x + random.uniform(-20, 20), note.y + random.uniform(-20, 20))
+            if now >= self.drag_until:
+                self.dragging = None
+        elif random.random() < 0.3 and self.view.shown:
+            self.dragging = random.choice(sorted(self.view.shown))
+            self.drag_until = now + random.uniform(0.5, 3.0)
+        if random.random() < 0.05 and self.view.shown:
+            self.board.vote(self.view, random.choice(sorted(self.view.shown)))
+        if random.random() < 0.02:
+            self.board.post(random.choice(IDEAS), self.x + random.uniform(0, VIEWPORT[0]),
+                            self.y + random.uniform(0, VIEWPORT[1]))
+        if random.random() < 0.01:
+            self.scroll(min(max(self.x + random.uniform(-400, 400), 0), self.board.width - VIEWPORT[0]),
+                        min(max(self.y + random.uniform(-300, 300), 0), self.board.height - VIEWPORT[1]))
+
+
+async def main(notes: int, editors: int, seconds: float, interval: float, seed: int) -> int:
+    random.seed(seed)
+    board = Board(flush_interval=interval, max_notes=notes * 2)
+    for i in range(notes):
+        board.post(f'{random.choice(IDEAS)} #{i + 1}', random.uniform(0, board.width), random.uniform(0, board.height))
+    board.dirty.clear()
+    clients, team = [], []
+    for _ in range(editors):
+        client = Client(page('/'))
+        with client:
+            team.append(Editor(board, BoardView(board)))
+        clients.append(client)
+    await asyncio.sleep(0)  # fire-and-forget method calls are queued on the next loop iteration
+    initial = [outbox_bytes(client) for client in clients]
+    full_board = len(json.dumps([note.full() for note in board.notes.values()]))
+
+    flush_times, received = [], [0] * editors
+    ticks = int(seconds / interval)
+    for tick in range(ticks):
+        for editor in team:
+            editor.step(tick * interval, interval)
+        start = time.perf_counter()
+        board.flush()
+        flush_times.append(time.perf_counter() - start)
+        await asyncio.sleep(0)
+        for i, client in enumerate(clients):
+            received[i] += outbox_bytes(client)
+
+    per_second = [size / seconds for size in received]
+    print(f'{len(board.notes)} notes, {editors} editors, {seconds:.0f} s at one flush per {interval * 1000:.0f} ms')
+    print(f'first view: {sum(initial) / editors / 1024:.1f} kB per browser on average '
+          f'(whole board {full_board / 1024:.1f} kB)')
+    print(f'flush: p50 {percentile(flush_times, 0.5) * 1000:.2f} ms, p99 {percentile(flush_times, 0.99) * 1000:.2f} ms, '
+          f'{board.deltas_sent} deltas sent')
+    print(f'received per browser: mean {sum(per_second) / editors / 1024:.2f} kB/s, '
+          f'max {max(per_second) / 1024:.2f} kB/s')
+    print(f'whole board on every flush with changes: {full_board / interval / 1024:.0f} kB/s per browser')
+    for client in clients:
+        client.delete()
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--notes', type=int, default=1000)
+    parser.add_argument('--editors', type=int, default=30)
+    parser.add_argument('--seconds', type=float, default=30, help='simulated board time')
+    parser.add_argument('--interval', type=float, default=0.1, help='flush interval in seconds')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    sys.exit(run(lambda: main(args.notes, args.editors, args.seconds, args.interval, args.seed)))
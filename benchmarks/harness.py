@@ -0,0 +1,42 @@
+"""
+Headless NiceGUI harness for benchmarks and leak checks.
+Pages are built in a real NiceGUI client inside this process, without a server or browser.
+"""
+
+import asyncio
+import os
+import sys
+from contextlib import contextmanager
+from typing import Awaitable, Callable
+
+# Allow `python benchmarks/<script>.py` as well as `python -m benchmarks.<script>`
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from nicegui import core  # noqa: E402
+from nicegui.client import Client  # noqa: E402
+from nicegui.page import page  # noqa: E402
+
+
+@contextmanager
+def headless_client(path: str = '/'):
+    """Create a client for building pages and enter its context"""
+    client = Client(page(path))
+    with client:
+        yield client
+    client.delete()
+
+
+def drain(client: Client):
+    """Drop queued outgoing messages, as if a browser had received them"""
+    client.outbox.messages.clear()
+    client.outbox.updates.clear()
+
+
+def run(main: Callable[[], Awaitable]):
+    """Run an async benchmark with the NiceGUI event loop set up"""
+    async def wrapper():
+        core.loop = asyncio.get_running_loop()
+        return await main()
+    return asyncio.run(wrapper())
@@ -0,0 +1,89 @@
+"""
+Leak check for repeated in-app navigation.
+
+Drives navigate_to through every page of home.FloatingMenuApp many times and reports
+how much memory, live objects, elements, event handlers, head HTML and HTTP routes are retained
+per cycle. Exits with status 1 when any growth exceeds its budget.
+
+    python -m benchmarks.leak_check --cycles 200
+"""
+
+import argparse
+import asyncio
+import gc
+import sys
+import tracemalloc
+
+from nicegui import core
+
+from benchmarks.harness import drain, headless_client, run
+
+# Allowed growth per cycle (one visit to every page)
+BUDGETS = {
+    'bytes': 2048,
+    'objects': 10,
+    'elements': 0,
+    'handlers': 0,
+    'head_html': 0,
+    'routes': 0,
+}
+
+
+def snapshot(client):
+    gc.collect()
+    return {
+        'bytes': tracemalloc.get_traced_memory()[0],
+        'objects': len(gc.get_objects()),
+        'elements': len(client.elements),
+        'handlers': sum(len(element._event_listeners) for element in client.elements.values()),
+        'head_html': len(client._head_html),
+        'routes': len(core.app.routes),
+    }
+
+
+async def cycle(menu, client):
+    for page_key in menu.pages:
+        menu.navigate_to(page_key)
+        await asyncio.sleep(0)  # let page-spawned background tasks (e.g. prefetching) run
+        drain(client)
+
+
+async def main(cycles: int, warmup: int, report_every: int) -> int:
+    from home import FloatingMenuApp
+
+    with headless_client() as client:
+        menu = FloatingMenuApp()
+        menu.run()
+        tracemalloc.start()
+        for _ in range(warmup):  # fill caches before taking the baseline
+            await cycle(menu, client)
+
+        start = previous = snapshot(client)
+        print(f'{"cycle":>7} ' + ' '.join(f'{key:>10}' for key in start))
+        for i in range(1, cycles + 1):
+            await cycle(menu, client)
+            if i % report_every == 0 or i == cycles:
+                current = snapshot(client)
+                delta = {key: (current[key] - previous[key]) / report_every for key in current}
+                print(f'{i:>7} ' + ' '.join(f'{value:>10.1f}' for value in delta.values()))
+                previous = current
+        end = snapshot(client)
+        tracemalloc.stop()
+
+    growth = {key: (end[key] - start[key]) / cycles for key in end}
+    failures = [key for key, value in growth.items() if value > BUDGETS[key]]
+    print('\nGrowth per cycle: ' + ', '.join(f'{key}={value:.1f} (budget {BUDGETS[key]})' for key, value in growth.items()))
+    if failures:
+        print(f'FAIL: over budget: {", ".join(failures)}')
+        return 1
+    print('OK')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cycles', type=int, default=200, help='navigation cycles through all pages')
+    parser.add_argument('--warmup', type=int, default=10, help='cycles before measuring')
+    parser.add_argument('--report-every', type=int, default=50, help='print growth every N cycles')
+    args = parser.parse_args()
+    sys.exit(run(lambda: main(args.cycles, args.warmup, args.report_every)))
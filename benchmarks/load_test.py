@@ -0,0 +1,207 @@
+"""
+Concurrent-user load generator.
+
+Simulated browsers (HTTP + Socket.IO, no real browser) navigate the floating menu, page through
+onboarding, spin the slider and chat with the design thinking agents, pausing for random think
+times. Concurrency ramps up in stages; for each stage the tool reports client-observed response
+latency, server handler latency and event-loop lag (from /metrics), worker memory and throughput.
+
+Start the app first (python home.py), then:
+
+    python -m benchmarks.load_test --url http://localhost:8080 --ramp 5,10,20,40 --stage-seconds 30
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.ws_client import SimulatedBrowser
+
+SAMPLE_PATTERN = re.compile(r'^(?P<name>[a-zA-Z_:][\w:]*)(?:\{(?P<labels>[^}]*)\})? (?P<value>\S+)$')
+MENU_PAGES = ['Page 1', 'Page 2', 'Page 3', 'Landing']
+
+
+def parse_metrics(text: str) -> Dict[Tuple[str, str], float]:
+    samples = {}
+    for line in text.splitlines():
+        match = SAMPLE_PATTERN.match(line)
+        if match:
+            samples[(match['name'], match['labels'] or '')] = float(match['value'])
+    return samples
+
+
+def histogram_quantile(q: float, buckets: List[Tuple[float, float]]) -> Optional[float]:
+    """Prometheus-style quantile from cumulative (upper bound, count) buckets"""
+    buckets = sorted(buckets)
+    total = buckets[-1][1] if buckets else 0
+    if total <= 0:
+        return None
+    rank = q * total
+    lower_bound, lower_count = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == float('inf'):
+                return lower_bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / max(count - lower_count, 1e-9)
+        lower_bound, lower_count = bound, count
+    return lower_bound
+
+
+def histogram_delta(before: dict, after: dict, metric: str) -> List[Tuple[float, float]]:
+    """Cumulative buckets of `metric`, summed over all label sets, between two scrapes"""
+    totals = defaultdict(float)
+    for (name, labels), value in after.items():
+        if name != f'{metric}_bucket':
+            continue
+        le = re.search(r'le="([^"]+)"', labels).group(1)
+        totals[float('inf') if le == '+Inf' else float(le)] += value - before.get((name, labels), 0.0)
+    return list(totals.items())
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class User:
+    def __init__(self, url: str, think: float, results: List[Tuple[str, float, Optional[float]]]):
+        self.browser = SimulatedBrowser(url)
+        self.think = think
+        self.results = results  # (action, finished at, response latency)
+        self.errors = 0
+
+    async def pause(self):
+        await asyncio.sleep(random.expovariate(1 / self.think))
+
+    async def act(self, name: str, action):
+        latency = await self.browser.respond(action)
+        self.results.append((name, time.perf_counter(), latency))
+
+    async def navigate(self, page: str):
+        await self.act(f'navigate {page}', self.browser.click(page))
+
+    async def chat(self):
+        await self.navigate('Design Thinking')
+        for _ in range(random.randint(1, 3)):
+            await self.pause()
+            await self.browser.type('Message', random.choice([
+                'Who are our primary users?',
+                'What frustrates them most today?',
+                'How might we shorten onboarding?',
+            ]))
+            await self.act('chat send', self.browser.click('Send'))
+
+    async def onboarding(self):
+        await self.navigate('Onboarding')
+        for _ in range(random.randint(2, 5)):
+            await self.pause()
+            await self.act('onboarding next', self.browser.click('Next Stage'))
+
+    async def slider(self):
+        await self.navigate('Slider')
+        for _ in range(random.randint(2, 6)):
+            await asyncio.sleep(random.uniform(0.3, 1.0))  # swiping is quicker than reading
+            # the settled index gets no reply, so it is sent without waiting; a page request does get one
+            await self.browser.emit('slider_index', random.randint(0, 2))
+            await self.act('slider page', self.browser.emit('slider_page', 0))
+
+    async def browse(self):
+        await self.navigate(random.choice(MENU_PAGES))
+
+    async def run(self, stop: asyncio.Event):
+        start = time.perf_counter()
+        await self.browser.open('/')
+        self.results.append(('page load', time.perf_counter(), time.perf_counter() - start))
+        scenarios = [self.browse, self.chat, self.onboarding, self.slider]
+        while not stop.is_set():
+            try:
+                await random.choice(scenarios)()
+            except (LookupError, ConnectionError, OSError):
+                self.errors += 1
+            await self.pause()
+        await self.browser.close()
+
+
+async def scrape(http: httpx.AsyncClient) -> dict:
+    response = await http.get('/metrics')
+    response.raise_for_status()
+    return parse_metrics(response.text)
+
+
+def ms(value: Optional[float]) -> str:
+    return f'{value * 1000:.0f}' if value is not None else '-'
+
+
+async def main(url: str, ramp: List[int], stage_seconds: float, think: float, seed: int, output: Optional[str]):
+    random.seed(seed)
+    stop = asyncio.Event()
+    users: List[User] = []
+    tasks = []
+    results: List[Tuple[str, float, Optional[float]]] = []
+    report = []
+    print(f'{"users":>6} {"actions/s":>10} {"resp p50":>9} {"resp p95":>9} {"resp p99":>9} '
+          f'{"hdlr p50":>9} {"hdlr p95":>9} {"hdlr p99":>9} {"lag p99":>8} {"lag max":>8} {"RSS MB":>7} {"errors":>7}')
+    async with httpx.AsyncClient(base_url=url, timeout=30) as http:
+        for target in ramp:
+            while len(users) < target:
+                user = User(url, think, results)
+                users.append(user)
+                tasks.append(asyncio.create_task(user.run(stop)))
+            before = await scrape(http)
+            stage_start = time.perf_counter()
+            await asyncio.sleep(stage_seconds)
+            after = await scrape(http)
+
+            window = [latency for _, finished, latency in results if finished >= stage_start and latency is not None]
+            actions = sum(1 for _, finished, _ in results if finished >= stage_start)
+            handler_buckets = histogram_delta(before, after, 'app_handler_duration_seconds')
+            lag_buckets = histogram_delta(before, after, 'app_event_loop_lag_seconds')
+            row = {
+                'users': target,
+                'actions_per_second': actions / stage_seconds,
+                'response_p50': percentile(window, 0.5),
+                'response_p95': percentile(window, 0.95),
+                'response_p99': percentile(window, 0.99),
+                'handler_p50': histogram_quantile(0.5, handler_buckets),
+                'handler_p95': histogram_quantile(0.95, handler_buckets),
+                'handler_p99': histogram_quantile(0.99, handler_buckets),
+                'loop_lag_p99': histogram_quantile(0.99, lag_buckets),
+                'loop_lag_max': after.get(('app_event_loop_lag_max_seconds', '')),
+                'rss_mb': after.get(('process_resident_memory_bytes', ''), 0) / 2**20,
+                'errors': sum(user.errors for user in users),
+            }
+            report.append(row)
+            print(f'{target:>6} {row["actions_per_second"]:>10.1f} {ms(row["response_p50"]):>9} '
+                  f'{ms(row["response_p95"]):>9} {ms(row["response_p99"]):>9} {ms(row["handler_p50"]):>9} '
+                  f'{ms(row["handler_p95"]):>9} {ms(row["handler_p99"]):>9} {ms(row["loop_lag_p99"]):>8} '
+                  f'{ms(row["loop_lag_max"]):>8} {row["rss_mb"]:>7.0f} {row["errors"]:>7}')
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'report written to {output}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8080', help='running app to test against')
+    parser.add_argument('--ramp', default='5,10,20,40', help='comma-separated concurrent users per stage')
+    parser.add_argument('--stage-seconds', type=float, default=30, help='duration of each stage')
+    parser.add_argument('--think', type=float, default=2.0, help='mean think time between actions in seconds')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the per-stage report as JSON')
+    args = parser.parse_args()
+    asyncio.run(main(args.url, [int(n) for n in args.ramp.split(',')], args.stage_seconds, args.think, args.seed,
+                     args.output))
+    sys.exit(0)
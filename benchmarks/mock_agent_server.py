@@ -0,0 +1,69 @@
+"""
+Local stand-in for an OpenAI-compatible chat completions API, for offline load tests of the agent layer.
+Replies after a random (log-normal) delay and fails a configurable fraction of requests with HTTP 503.
+
+    python -m benchmarks.mock_agent_server --port 8001 --latency 0.8 --error-rate 0.05
+    AGENT_BASE_URL=http://localhost:8001 python home.py
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import re
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+mock = FastAPI()
+settings = {'latency': 0.8, 'jitter': 0.5, 'error_rate': 0.0}
+stats = {'requests': 0, 'errors': 0, 'in_flight': 0, 'max_in_flight': 0}
+
+
+@mock.post('/v1/chat/completions')
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats['requests'] += 1
+    stats['in_flight'] += 1
+    stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+    try:
+        # log-normal with the configured median
+        await asyncio.sleep(settings['latency'] * math.exp(random.gauss(0, settings['jitter'])))
+        if random.random() < settings['error_rate']:
+            stats['errors'] += 1
+            return JSONResponse({'error': {'message': 'overloaded'}}, status_code=503)
+        messages = body.get('messages', [])
+        system = next((m['content'] for m in messages if m['role'] == 'system'), '')
+        persona = re.search(r'You are the (.+?) in', system)
+        question = next((m['content'] for m in reversed(messages) if m['role'] == 'user'), '')
+        content = (f'[{persona.group(1) if persona else "agent"}] Thinking about "{question[:80]}": '
+                   'who would notice first if this problem disappeared tomorrow?')
+        return {
+            'id': f'mock-{stats["requests"]}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'mock'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': sum(len(m['content'].split()) for m in messages),
+                      'completion_tokens': len(content.split())},
+        }
+    finally:
+        stats['in_flight'] -= 1
+
+
+@mock.get('/stats')
+def get_stats():
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.8, help='median reply delay in seconds')
+    parser.add_argument('--jitter', type=float, default=0.5, help='log-normal sigma of the delay')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    args = parser.parse_args()
+    settings.update(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    uvicorn.run(mock, host='127.0.0.1', port=args.port, log_level='warning')
@@ -0,0 +1,166 @@
+"""
+Page build and navigation benchmark.
+
+Builds every page in a headless NiceGUI client and measures build time (median of the repeats),
+elements created and peak traced memory, then measures FloatingMenuApp transitions from each page
+to the next one in menu order (wrapping around).
+Results are written as JSON and compared with the stored budgets; any metric over budget fails.
+
+    python -m benchmarks.page_bench                   # check against page_budgets.json
+    python -m benchmarks.page_bench --update-budgets  # re-baseline after an intended change
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from nicegui import ui
+
+from benchmarks.harness import drain, headless_client, run
+
+HERE = Path(__file__).parent
+BUDGETS_FILE = HERE / 'page_budgets.json'
+RESULTS_FILE = HERE / 'page_results.json'
+
+# Budget = measured value * headroom; timings are noisy across machines, element counts are not
+HEADROOM = {'build_ms': 3.0, 'elements': 1.0, 'peak_kb': 1.5}
+
+
+def page_builders():
+    from design_thinking_platform import DesignThinkingPlatform
+    from landing import setup_page
+    from onboarding import DesignThinkingApp1
+    from page1 import create_page1
+    from page2 import create_page2
+    from page3 import create_page3
+    from slider import CardSlider
+
+    return {
+        'page1': create_page1,
+        'page2': create_page2,
+        'page3': create_page3,
+        'landing': setup_page,
+        'onboarding': lambda: DesignThinkingApp1().create_ui(),
+        'slider': lambda: CardSlider().create_ui(),
+        'design_thinking_platform': lambda: DesignThinkingPlatform().build_ui(),
+    }
+
+
+async def measure(client, action, repeats: int) -> dict:
+    """Run `action` repeatedly (after one warm-up) and return median time, elements and peak memory"""
+    times, elements, peaks = [], [], []
+    for i in range(repeats + 1):
+        container, build = action()
+        next_id = client.next_element_id
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        build()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        created = client.next_element_id - next_id
+        await asyncio.sleep(0)  # let spawned tasks (e.g. prefetching) run before cleaning up
+        if container is not None:
+            container.delete()
+        drain(client)
+        if i:
+            times.append(elapsed * 1000)
+            elements.append(created)
+            peaks.append(peak / 1024)
+    return {
+        'build_ms': round(statistics.median(times), 2),
+        'elements': max(elements),
+        'peak_kb': round(max(peaks), 1),
+    }
+
+
+async def bench_pages(repeats: int) -> dict:
+    results = {}
+    for name, builder in page_builders().items():
+        with headless_client() as client:
+            def action():
+                container = ui.element('div')
+
+                def build():
+                    with container:
+                        builder()
+                return container, build
+            results[f'page/{name}'] = await measure(client, action, repeats)
+    return results
+
+
+async def bench_transitions(repeats: int) -> dict:
+    from home import FloatingMenuApp
+
+    results = {}
+    with headless_client() as client:
+        menu = FloatingMenuApp()
+        menu.run()
+        drain(client)
+        pages = list(menu.pages)
+        for source, target in zip(pages, pages[1:] + pages[:1]):
+            def action(source=source, target=target):
+                menu.navigate_to(source)
+                drain(client)
+                return None, lambda: menu.navigate_to(target)
+            results[f'navigate/{source}->{target}'] = await measure(client, action, repeats)
+    return results
+
+
+def compare(results: dict, budgets: dict) -> list:
+    failures = []
+    for name, metrics in results.items():
+        budget = budgets.get(name)
+        if budget is None:
+            continue
+        for key, value in metrics.items():
+            if key in budget and value > budget[key]:
+                failures.append(f'{name}: {key} {value} > budget {budget[key]}')
+    return failures
+
+
+async def main(repeats: int, update_budgets: bool, transitions: bool) -> int:
+    tracemalloc.start()
+    results = await bench_pages(repeats)
+    if transitions:
+        results.update(await bench_transitions(repeats))
+    tracemalloc.stop()
+
+    RESULTS_FILE.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+    width = max(len(name) for name in results)
+    print(f'{"benchmark":<{width}} {"build ms":>9} {"elements":>9} {"peak kB":>9}')
+    for name, metrics in results.items():
+        print(f'{name:<{width}} {metrics["build_ms"]:>9.2f} {metrics["elements"]:>9} {metrics["peak_kb"]:>9.1f}')
+    print(f'\nresults written to {RESULTS_FILE}')
+
+    if update_budgets:
+        budgets = {name: {key: round(value * HEADROOM[key], 2) for key, value in metrics.items()}
+                   for name, metrics in results.items()}
+        BUDGETS_FILE.write_text(json.dumps(budgets, indent=2, sort_keys=True) + '\n')
+        print(f'budgets written to {BUDGETS_FILE}')
+        return 0
+
+    if not BUDGETS_FILE.exists():
+        print('no budgets stored yet; run with --update-budgets')
+        return 1
+    failures = compare(results, json.loads(BUDGETS_FILE.read_text()))
+    if failures:
+        print('FAIL: over budget\n  ' + '\n  '.join(failures))
+        return 1
+    print('OK: all benchmarks within budget')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeats', type=int, default=5, help='measured builds per benchmark')
+    parser.add_argument('--update-budgets', action='store_true', help='store current results as the new budgets')
+    parser.add_argument('--no-transitions', dest='transitions', action='store_false',
+                        help='only benchmark page builds')
+    args = parser.parse_args()
+    sys.exit(run(lambda: main(args.repeats, args.update_budgets, args.transitions)))
@@ -0,0 +1,102 @@
+"""
+Micro-benchmark of agent prompt assembly.
+
+Compares rebuilding the system prompt and re-tokenizing the whole history on every call (the naive
+way) with compiled step prompts plus incremental context assembly (prompts.py), over a growing
+conversation. Reports the mean cost per call at a few conversation lengths, then walks a session
+through all ten steps and compares the tokens sent per call with the whole session history.
+
+    python -m benchmarks.prompt_bench --turns 200 --budget 3000
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from benchmarks import harness  # noqa: F401  (puts the repo root on sys.path)
+from design_thinking_platform import DesignThinkingPlatform
+from prompts import (MESSAGE_OVERHEAD, SYSTEM_TEMPLATE, ConversationContext, SessionContext, compile_step,
+                     count_messages, count_tokens)
+
+WORDS = ('users onboarding friction research interview insight prototype journey need painpoint '
+         'assumption metric feedback test idea persona empathy problem solution workflow').split()
+
+
+def naive_assemble(step, history, budget):
+    """Render the template and tokenize every message again, then trim to the budget"""
+    system_prompt = SYSTEM_TEMPLATE.format(
+        agent=step.agent, name=step.name, description=step.description[0].lower() + step.description[1:],
+        questions='\n'.join(f'- {question}' for question in step.questions))
+    remaining = budget - count_tokens(system_prompt) - MESSAGE_OVERHEAD
+    selected = []
+    for message in reversed(history):
+        tokens = count_tokens(message['content']) + MESSAGE_OVERHEAD
+        if tokens > remaining:
+            break
+        selected.append(message)
+        remaining -= tokens
+    return [{'role': 'system', 'content': system_prompt}, *reversed(selected)]
+
+
+def random_messages(count):
+    return [{'role': 'user' if i % 2 == 0 else 'assistant',
+             'content': ' '.join(random.choices(WORDS, k=random.randint(10, 60))) + '?'}
+            for i in range(count)]
+
+
+def session_growth(steps, turns_per_step: int, budget: int):
+    """Tokens and time per call while one session moves through every step"""
+    session = SessionContext(budget=budget)
+    history_tokens = 0
+    print(f'\n{"step":>4} {"session tokens":>15} {"full history":>13} {"sent tokens":>12} {"µs/call":>8}')
+    for index, step in enumerate(steps):
+        session.step(index, compile_step(step))
+        elapsed, sent = 0.0, 0
+        for message in random_messages(turns_per_step):
+            start = time.perf_counter()
+            session.append(index, message['role'], message['content'])
+            assembled = session.assemble(index)
+            elapsed += time.perf_counter() - start
+            history_tokens += count_tokens(message['content']) + MESSAGE_OVERHEAD
+            sent = count_messages(assembled)
+        print(f'{index:>4} {session.total_tokens:>15} {history_tokens:>13} {sent:>12} '
+              f'{elapsed / turns_per_step * 1e6:>8.1f}')
+
+
+def main(turns: int, budget: int, seed: int) -> int:
+    random.seed(seed)
+    steps = DesignThinkingPlatform().design_steps
+    step = steps[0]
+    messages = random_messages(turns)
+    checkpoints = sorted({max(1, turns // 10), turns // 4, turns // 2, turns})
+    naive_time = compiled_time = 0.0
+    history = []
+    context = ConversationContext(compile_step(step), budget=budget)
+    print(f'{"turns":>6} {"naive µs/call":>14} {"compiled µs/call":>17} {"speedup":>8} {"sent msgs":>10}')
+    for turn, message in enumerate(messages, 1):
+        start = time.perf_counter()
+        history.append(message)
+        naive = naive_assemble(step, history, budget)
+        naive_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        context.append(message['role'], message['content'])
+        compiled = context.assemble()
+        compiled_time += time.perf_counter() - start
+
+        assert naive == compiled
+        if turn in checkpoints:
+            print(f'{turn:>6} {naive_time / turn * 1e6:>14.1f} {compiled_time / turn * 1e6:>17.1f} '
+                  f'{naive_time / compiled_time:>7.1f}x {len(compiled) - 1:>10}')
+    session_growth(steps, max(2, turns // 5), budget)
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--turns', type=int, default=200, help='messages in the simulated conversation')
+    parser.add_argument('--budget', type=int, default=3000, help='context token budget')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    sys.exit(main(args.turns, args.budget, args.seed))
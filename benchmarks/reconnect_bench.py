@@ -0,0 +1,99 @@
+"""
+Reconnect benchmark under simulated flaky links.
+
+Each simulated browser opens the home page, switches to the Design Thinking page and sends a chat
+message, then loses its websocket while the agent reply is still pending. After a random outage it
+reconnects with the last message id it saw. A resumed client only receives the missed messages;
+a full reload (outage longer than the reconnect timeout) costs a whole page load.
+
+Start the app first (python home.py), then:
+
+    python -m benchmarks.reconnect_bench --url http://localhost:8080 --clients 20
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+import httpx
+import socketio
+
+from benchmarks.ws_client import SimulatedBrowser
+
+
+async def flaky_session(url: str, outage: float) -> dict:
+    browser = SimulatedBrowser(url)
+    try:
+        await browser.open('/')
+        await browser.settle()
+        await browser.click('Design Thinking')
+        await browser.settle()
+        await browser.type('Message', 'How do we recruit interview participants?')
+        await browser.click('Send')
+        await asyncio.sleep(0.1)
+        await browser.drop()  # the agent reply arrives while we are offline
+
+        await asyncio.sleep(outage)
+        before = browser.bytes_received
+        start = time.perf_counter()
+        try:
+            await browser.connect()
+            await browser.settle()
+        except socketio.exceptions.ConnectionError:  # server already deleted this client
+            browser.reload_requested = True
+        latency = browser.last_message_at - start if browser.bytes_received > before else 0.0
+        if browser.reload_requested:
+            reload_start = time.perf_counter()
+            before = browser.bytes_received
+            await browser.drop()
+            await browser.open('/')
+            await browser.settle()
+            return {'resumed': False, 'bytes': browser.page_bytes + browser.bytes_received - before,
+                    'latency': time.perf_counter() - reload_start, 'page_bytes': browser.page_bytes}
+        return {'resumed': True, 'bytes': browser.bytes_received - before, 'latency': latency,
+                'page_bytes': browser.page_bytes}
+    finally:
+        await browser.close()
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def main(url: str, clients: int, min_outage: float, max_outage: float, seed: int) -> int:
+    random.seed(seed)
+    outages = [random.uniform(min_outage, max_outage) for _ in range(clients)]
+    results = await asyncio.gather(*(flaky_session(url, outage) for outage in outages))
+
+    resumed = [r for r in results if r['resumed']]
+    reloaded = [r for r in results if not r['resumed']]
+    full_page = statistics.mean(r['page_bytes'] for r in results)
+    print(f'clients: {clients}, outages {min_outage:.1f}-{max_outage:.1f}s')
+    print(f'full page load: {full_page / 1024:.1f} kB')
+    if resumed:
+        resume_bytes = statistics.mean(r['bytes'] for r in resumed)
+        print(f'resumed: {len(resumed)}, {resume_bytes / 1024:.2f} kB per reconnect '
+              f'({resume_bytes / full_page:.1%} of a page load), '
+              f'p50 {percentile([r["latency"] for r in resumed], 0.5) * 1000:.0f} ms, '
+              f'p95 {percentile([r["latency"] for r in resumed], 0.95) * 1000:.0f} ms')
+    print(f'full reloads: {len(reloaded)}')
+    async with httpx.AsyncClient() as http:
+        response = await http.get(f'{url.rstrip("/")}/sessions/stats')
+        if response.status_code == 200:
+            print(f'server: {response.json()}')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8080', help='running app to test against')
+    parser.add_argument('--clients', type=int, default=20, help='concurrent simulated browsers')
+    parser.add_argument('--min-outage', type=float, default=0.5, help='shortest connection loss in seconds')
+    parser.add_argument('--max-outage', type=float, default=5.0, help='longest connection loss in seconds')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.url, args.clients, args.min_outage, args.max_outage, args.seed)))
@@ -0,0 +1,171 @@
+"""
+Simulated browser speaking NiceGUI's HTTP + Socket.IO protocol directly (no real browser).
+Used by the reconnect benchmark and the load generator against a running server.
+"""
+
+import ast
+import asyncio
+import json
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+from urllib.parse import urlencode
+
+import httpx
+import socketio
+
+ELEMENTS_PATTERN = re.compile(r'parseElements\(String\.raw`(.*?)`\)', re.S)
+QUERY_PATTERN = re.compile(r'query: (\{.*?\}),\n')
+
+
+def parse_elements(raw: str) -> Dict[str, Any]:
+    for escaped, char in (('&#36;', '$'), ('&#96;', '`'), ('&gt;', '>'), ('&lt;', '<'), ('&amp;', '&')):
+        raw = raw.replace(escaped, char)
+    return json.loads(raw)
+
+
+class SimulatedBrowser:
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+        self.http = httpx.AsyncClient(base_url=self.base_url, timeout=30)
+        self.sio: Optional[socketio.AsyncClient] = None
+        self.elements: Dict[str, Any] = {}
+        self.query: Dict[str, Any] = {}
+        self.next_message_id = 0
+        self.bytes_received = 0
+        self.messages_received = 0
+        self.page_bytes = 0
+        self.last_message_at = 0.0
+        self.reload_requested = False
+
+    @property
+    def client_id(self) -> str:
+        return self.query['client_id']
+
+    async def open(self, path: str = '/'):
+        """Load a page like a browser would and connect its websocket"""
+        response = await self.http.get(path)
+        response.raise_for_status()
+        self.page_bytes = len(response.content)
+        self.elements = parse_elements(ELEMENTS_PATTERN.search(response.text).group(1))
+        self.query = ast.literal_eval(QUERY_PATTERN.search(response.text).group(1))
+        self.next_message_id = int(self.query.get('next_message_id', 0))
+        self.reload_requested = False
+        await self.connect()
+
+    async def connect(self):
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.sio.on('*', self.handle_message)
+        query = {
+            **self.query,
+            'next_message_id': self.next_message_id,
+            'document_id': self.client_id,
+            'tab_id': self.client_id,
+            'implicit_handshake': 'true',
+        }
+        try:
+            await self.sio.connect(f'{self.base_url}?{urlencode(query)}', socketio_path='/_nicegui_ws/socket.io',
+                                   transports=['websocket'])
+        except socketio.exceptions.ConnectionError:  # the server refuses client ids it has already deleted
+            await self.sio.eio.disconnect(abort=True)
+            self.sio = None
+            raise
+
+    async def handle_message(self, event: str, data: Any = None):
+        self.messages_received += 1
+        self.bytes_received += len(json.dumps([event, data], default=str))
+        self.last_message_at = time.perf_counter()
+        if isinstance(data, dict) and '_id' in data:
+            if data['_id'] < self.next_message_id:
+                return
+            self.next_message_id = data.pop('_id') + 1
+        if event == 'update':
+            for element_id, element in data.items():
+                if element is None:
+                    self.elements.pop(element_id, None)
+                else:
+                    self.elements[element_id] = element
+        elif event == 'run_javascript' and 'location.reload' in data.get('code', ''):
+            self.reload_requested = True
+        elif event == 'try_reconnect':
+            self.reload_requested = True
+
+    async def drop(self):
+        """Lose the connection without reloading the page"""
+        if self.sio:
+            await self.sio.disconnect()
+            self.sio = None
+
+    async def settle(self, quiet: float = 0.2, timeout: float = 5.0):
+        """Wait until no message has arrived for `quiet` seconds"""
+        start = time.perf_counter()
+        self.last_message_at = max(self.last_message_at, start)
+        while time.perf_counter() - self.last_message_at < quiet and time.perf_counter() - start < timeout:
+            await asyncio.sleep(quiet / 4)
+
+    async def wait_for(self, lookup: Callable[[], Any], timeout: float = 10.0) -> Any:
+        """Retry a lookup until the element it needs has arrived"""
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                return lookup()
+            except LookupError:
+                if time.perf_counter() > deadline:
+                    raise
+                await asyncio.sleep(0.05)
+
+    async def respond(self, action: Awaitable, timeout: float = 10.0) -> Optional[float]:
+        """Run an action and return the time until the server's first message in response (None if silent)"""
+        count = self.messages_received
+        start = time.perf_counter()
+        await action
+        while self.messages_received == count:
+            if time.perf_counter() - start > timeout:
+                return None
+            await asyncio.sleep(0.005)
+        return time.perf_counter() - start
+
+    def find(self, text: str, event_type: str = 'click'):
+        """Find an element by label/text that listens to the given event"""
+        for element_id, element in self.elements.items():
+            label = element.get('text') or element.get('props', {}).get('label')
+            if label == text:
+                for event in element.get('events', []):
+                    if event['type'] == event_type:
+                        return element_id, event['listener_id']
+        raise LookupError(f'no element "{text}" with a {event_type} listener')
+
+    async def trigger(self, element_id: str, listener_id: str, *args):
+        await self.sio.emit('event', {
+            'id': int(element_id),
+            'client_id': self.client_id,
+            'listener_id': listener_id,
+            'args': [json.dumps(arg) for arg in args],
+        })
+
+    def find_input(self, placeholder: str):
+        """Find an input by the start of its placeholder"""
+        for element_id, element in self.elements.items():
+            if element.get('props', {}).get('placeholder', '').startswith(placeholder):
+                for event in element.get('events', []):
+                    if event['type'] in ('update:value', 'update:modelValue'):
+                        return element_id, event['listener_id']
+        raise LookupError(f'no input with placeholder "{placeholder}"')
+
+    async def click(self, text: str):
+        await self.trigger(*await self.wait_for(lambda: self.find(text, 'click')))
+
+    async def type(self, placeholder: str, value: str):
+        await self.trigger(*await self.wait_for(lambda: self.find_input(placeholder)), value)
+
+    async def emit(self, event_type: str, arg: Any):
+        """Emit a global event, like emitEvent() in the browser"""
+        for event in self.elements['0'].get('events', []):
+            if event['type'] == event_type:
+                await self.trigger('0', event['listener_id'], arg)
+                return
+        raise LookupError(f'no global listener for "{event_type}"')
+
+    async def close(self):
+        await self.drop()
+        await self.http.aclose()
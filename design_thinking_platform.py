@@ -4,11 +4,25 @@ Design Thinking Platform using NiceUI (Python)
 A collaborative AI-powered design thinking journey with multiple specialized agents.
 """
 
-from nicegui import ui, app
+from nicegui import ui, app, run
 from typing import Dict, List, Optional
 import asyncio
+import os
+import random
 from datetime import datetime
 from dataclasses import dataclass, field
+from page_utils import add_head_html_once
+from metrics import timed
+from profiling import profiled
+from task_supervisor import spawn
+from agents import AgentError, agent_backend
+from prompts import ConversationContext, SessionContext, compile_step
+from progress import ProgressScorer
+from suggestions import PromptRanker
+from affinity import AffinityMap
+from ideation import MAX_NOTE_LENGTH, Board, BoardView
+from artifacts import ACCEPT, MAX_UPLOAD_BYTES, ArtifactLibrary, cite
+from search_index import SearchHit
 
 @dataclass
 class DesignStep:
@@ -18,20 +32,43 @@ class DesignStep:
     agent: str
     description: str
     questions: List[str]
+    signals: List[str] = field(default_factory=list)  # answer vocabulary, one entry per question
 
 @dataclass
 class Message:
     type: str  # 'user' or 'agent'
     content: str
     timestamp: str
+    agent: Optional[str] = None  # set for consult panel replies, which come from other steps' agents
+
+@dataclass
+class DesignThinkingState:
+    """Plain data of a user's journey, kept in the browser session while the page objects are rebuilt"""
+    current_step: int = 0
+    messages: Dict[int, List[Message]] = field(default_factory=dict)
 
 class DesignThinkingPlatform:
-    def __init__(self):
-        self.current_step = 0
-        self.messages: Dict[int, List[Message]] = {}
+    def __init__(self, board: Optional[Board] = None, state: Optional[DesignThinkingState] = None):
+        self.state = state or DesignThinkingState()
         self.step_progress = [0] * 10
         self.chat_container = None
-        self.progress_cards = []
+        self.progress_cards: List[Dict[str, ui.element]] = []  # per step: sidebar icon and bar, panel badge
+        self.progress_badge: Optional[ui.badge] = None
+        self.suggestion_buttons: List[ui.button] = []
+        self.affinity_container = None
+        self.board = board or Board()  # the ideation board of this browser session
+        self.board_view: Optional[BoardView] = None
+        # Research artifacts attached in the chat, searchable and citeable from the message box
+        self.artifacts = ArtifactLibrary(stage=lambda: self.current_step)
+        self.artifacts.on_change(self.update_artifacts)
+        self.artifact_container = None
+        self.artifact_results = None
+        # Consult panel: fan a message out to several agents at once
+        self.consult_mode = False
+        self.consult_steps = [3, 4, 5]  # Research, Prototype, Test
+        self.consult_timeout = 15.0
+        # Agent context of the whole session, tokenized as messages are added and trimmed to a budget
+        self.context = SessionContext(budget=int(os.environ.get('AGENT_CONTEXT_TOKENS', '3000')))
         
         self.design_steps = [
             DesignStep(
@@ -40,7 +77,13 @@ class DesignThinkingPlatform:
                 color='bg-pink-500',
                 agent='Empathy Agent',
                 description='Understand user needs and pain points',
-                questions=['What are users struggling with?', 'What emotions are involved?', 'What context matters?']
+                questions=['What are users struggling with?', 'What emotions are involved?', 'What context matters?'],
+                # words that answers to each question tend to use, in question order
+                signals=[
+                    'struggle problem pain frustrating difficult hard issue obstacle barrier complain fail slow confusing annoying waste',
+                    'feel feeling emotion anxious stressed frustrated overwhelmed angry happy guilty afraid fear worry lonely excited bored',
+                    'context environment home office remote team situation time location device schedule habits culture setting family',
+                ]
             ),
             DesignStep(
                 name='Define',
@@ -48,7 +91,12 @@ class DesignThinkingPlatform:
                 color='bg-purple-500',
                 agent='Problem Definition Agent',
                 description='Synthesize observations into problem statement',
-                questions=['What is the core problem?', 'Who is affected?', 'Why does this matter?']
+                questions=['What is the core problem?', 'Who is affected?', 'Why does this matter?'],
+                signals=[
+                    'problem core root cause need statement challenge underlying issue main',
+                    'affected users people customers persona segment audience stakeholders group employees',
+                    'matter important impact cost value consequence because lose revenue risk',
+                ]
             ),
             DesignStep(
                 name='Ideate',
@@ -56,7 +104,12 @@ class DesignThinkingPlatform:
                 color='bg-yellow-500',
                 agent='Ideation Agent',
                 description='Generate creative solutions',
-                questions=['What if we tried...?', 'How might we...?', 'What are unconventional approaches?']
+                questions=['What if we tried...?', 'How might we...?', 'What are unconventional approaches?'],
+                signals=[
+                    'tried try idea concept alternative experiment approach option',
+                    'might could opportunity idea solution enable help reduce improve',
+                    'unconventional wild radical creative unusual different novel bold reverse crazy',
+                ]
             ),
             DesignStep(
                 name='Research',
@@ -64,7 +117,12 @@ class DesignThinkingPlatform:
                 color='bg-blue-500',
                 agent='Research Agent',
                 description='Validate assumptions and gather insights',
-                questions=['What data supports this?', 'What are competitors doing?', 'What trends are relevant?']
+                questions=['What data supports this?', 'What are competitors doing?', 'What trends are relevant?'],
+                signals=[
+                    'data evidence survey interview metrics analytics numbers percent study statistics research findings',
+                    'competitors competition market rivals alternatives products companies benchmark existing tools',
+                    'trends trend growing emerging future shift adoption industry market rising',
+                ]
             ),
             DesignStep(
                 name='Prototype',
@@ -72,7 +130,12 @@ class DesignThinkingPlatform:
                 color='bg-green-500',
                 agent='Prototyping Agent',
                 description='Build quick, testable versions',
-                questions=['What\'s the simplest version?', 'What can we test quickly?', 'What tools should we use?']
+                questions=['What\'s the simplest version?', 'What can we test quickly?', 'What tools should we use?'],
+                signals=[
+                    'simplest minimal mvp basic core feature version scope small',
+                    'test quickly fast cheap experiment assumption validate week mockup sketch',
+                    'tools figma paper prototype mockup wireframe code build platform software',
+                ]
             ),
             DesignStep(
                 name='Test',
@@ -80,7 +143,12 @@ class DesignThinkingPlatform:
                 color='bg-red-500',
                 agent='Testing Agent',
                 description='Gather feedback and validate solutions',
-                questions=['How do users respond?', 'What works/doesn\'t work?', 'What should change?']
+                questions=['How do users respond?', 'What works/doesn\'t work?', 'What should change?'],
+                signals=[
+                    'users respond reaction feedback liked disliked said loved hated confused',
+                    'works worked broken failed success problem issue fine smooth',
+                    'change fix remove add redesign adjust improve replace',
+                ]
             ),
             DesignStep(
                 name='Implement',
@@ -88,7 +156,12 @@ class DesignThinkingPlatform:
                 color='bg-indigo-500',
                 agent='Implementation Agent',
                 description='Execute and launch the solution',
-                questions=['What\'s our rollout plan?', 'What resources do we need?', 'How do we measure success?']
+                questions=['What\'s our rollout plan?', 'What resources do we need?', 'How do we measure success?'],
+                signals=[
+                    'rollout launch release phase pilot plan timeline schedule deploy beta',
+                    'resources budget people team engineers money time hire skills infrastructure',
+                    'measure success metrics kpi adoption retention conversion target goal track',
+                ]
             ),
             DesignStep(
                 name='Learn',
@@ -96,7 +169,12 @@ class DesignThinkingPlatform:
                 color='bg-orange-500',
                 agent='Learning Agent',
                 description='Analyze results and extract insights',
-                questions=['What did we learn?', 'What worked well?', 'What would we do differently?']
+                questions=['What did we learn?', 'What worked well?', 'What would we do differently?'],
+                signals=[
+                    'learned learn insight lesson discovered realized surprised found',
+                    'worked well success good effective helped strength',
+                    'differently mistake change instead next avoid regret better',
+                ]
             ),
             DesignStep(
                 name='Iterate',
@@ -104,7 +182,12 @@ class DesignThinkingPlatform:
                 color='bg-teal-500',
                 agent='Iteration Agent',
                 description='Refine based on learnings',
-                questions=['How can we improve?', 'What needs adjustment?', 'What\'s the next version?']
+                questions=['How can we improve?', 'What needs adjustment?', 'What\'s the next version?'],
+                signals=[
+                    'improve better enhance optimize refine faster easier',
+                    'adjust adjustment tweak change fix tune modify',
+                    'next version release roadmap iteration update feature',
+                ]
             ),
             DesignStep(
                 name='Scale',
@@ -112,20 +195,67 @@ class DesignThinkingPlatform:
                 color='bg-gray-600',
                 agent='Scaling Agent',
                 description='Expand successful solutions',
-                questions=['How do we scale this?', 'What systems are needed?', 'How do we maintain quality?']
+                questions=['How do we scale this?', 'What systems are needed?', 'How do we maintain quality?'],
+                signals=[
+                    'scale grow growth expand users markets volume automate',
+                    'systems infrastructure process automation platform support operations tooling',
+                    'quality standards consistency review monitoring testing reliability',
+                ]
             )
         ]
         
+        # Every persona gets its own settings on the worker's shared agent connection pool
+        for step in self.design_steps:
+            agent_backend.configure(step.agent, system_prompt=compile_step(step).system_prompt,
+                                    suggestions=step.questions)
+        
         # Initialize with sample messages
-        self.messages[0] = [
-            Message('agent', 'Hi! I\'m your Empathy Agent. Let\'s dive deep into understanding your users. What problem are you trying to solve?', '10:30 AM'),
-            Message('user', 'We\'re working on a productivity app for remote workers who struggle with focus.', '10:31 AM'),
-            Message('agent', 'Great starting point! Tell me about the emotional journey these remote workers experience. What does a typical distracted day look like for them?', '10:32 AM')
-        ]
+        if not self.messages:
+            self.messages[0] = [
+                Message('agent', 'Hi! I\'m your Empathy Agent. Let\'s dive deep into understanding your users. What problem are you trying to solve?', '10:30 AM'),
+                Message('user', 'We\'re working on a productivity app for remote workers who struggle with focus.', '10:31 AM'),
+                Message('agent', 'Great starting point! Tell me about the emotional journey these remote workers experience. What does a typical distracted day look like for them?', '10:32 AM')
+            ]
+        
+        # Progress is how well the user's messages cover each step's questions;
+        # suggested prompts are ranked against the conversation so far
+        self.progress_scorer = ProgressScorer(self.design_steps)
+        self.prompt_ranker = PromptRanker(self.design_steps)
+        # What users type in Empathize is grouped into an affinity map for the Define step
+        self.affinity_map = AffinityMap()
+        # Scores, rankings and groups are derived from the messages, so a restored session rebuilds them
+        for step_index, messages in self.messages.items():
+            for message in messages:
+                self.prompt_ranker.observe(step_index, message.content, user=message.type == 'user')
+                if message.type == 'user':
+                    self.step_progress[step_index] = self.progress_scorer.add(step_index, message.content)
+                    if step_index == 0:
+                        self.affinity_map.add(message.content)
+
+    @property
+    def current_step(self) -> int:
+        return self.state.current_step
+
+    @current_step.setter
+    def current_step(self, step_index: int):
+        self.state.current_step = step_index
+
+    @property
+    def messages(self) -> Dict[int, List[Message]]:
+        return self.state.messages
 
     def get_current_step(self) -> DesignStep:
         return self.design_steps[self.current_step]
 
+    def context_for(self, step_index: int) -> ConversationContext:
+        """Agent context of a step, seeded with the messages it already has"""
+        if step_index not in self.context.steps:
+            self.context.step(step_index, compile_step(self.design_steps[step_index]))
+            for message in self.messages.get(step_index, []):
+                self.context.append(step_index, 'user' if message.type == 'user' else 'assistant', message.content)
+        return self.context.steps[step_index]
+
+    @timed
     async def switch_step(self, step_index: int):
         """Switch to a different design thinking step"""
         self.current_step = step_index
@@ -136,7 +266,11 @@ class DesignThinkingPlatform:
         await self.update_chat_display()
         await self.update_header()
         await self.update_input_placeholder()
+        await self.update_suggestions()
+        await self.update_progress_display()
 
+    @timed
+    @profiled
     async def send_message(self, message_text: str):
         """Send a user message and get agent response"""
         if not message_text.strip():
@@ -146,35 +280,86 @@ class DesignThinkingPlatform:
         timestamp = datetime.now().strftime('%I:%M %p')
         user_message = Message('user', message_text, timestamp)
         
-        if self.current_step not in self.messages:
-            self.messages[self.current_step] = []
+        # The user may switch steps while the agent is answering; the reply belongs to this step
+        step_index = self.current_step
+        self.context_for(step_index)
+        if step_index not in self.messages:
+            self.messages[step_index] = []
         
-        self.messages[self.current_step].append(user_message)
+        self.messages[step_index].append(user_message)
+        self.context.append(step_index, 'user', message_text)
         
         # Update progress
-        self.step_progress[self.current_step] = min(100, self.step_progress[self.current_step] + 20)
+        self.step_progress[step_index] = self.progress_scorer.add(step_index, message_text)
+        self.prompt_ranker.observe(step_index, message_text)
+        await self.update_suggestions()
+        if step_index == 0:
+            self.add_affinity_note(message_text)
         
-        # Simulate agent response
-        await asyncio.sleep(1)
-        current_step_data = self.get_current_step()
-        import random
-        random_question = random.choice(current_step_data.questions)
+        # Ask the step's agent
+        agent = self.design_steps[step_index].agent
+        try:
+            reply = await agent_backend.reply(agent, self.context.assemble(step_index))
+            self.context.append(step_index, 'assistant', reply)
+            self.prompt_ranker.observe(step_index, reply, user=False)
+        except AgentError:
+            reply = f'Sorry, the {agent} is unavailable right now. Please try again in a moment.'
         
-        agent_response = Message(
-            'agent',
-            f'That\'s an interesting point about "{message_text}". Let me help you explore this further. {random_question}',
-            datetime.now().strftime('%I:%M %p')
-        )
+        agent_response = Message('agent', reply, datetime.now().strftime('%I:%M %p'))
         
-        self.messages[self.current_step].append(agent_response)
+        self.messages[step_index].append(agent_response)
         
         # Update UI
         await self.update_chat_display()
         await self.update_progress_display()
 
+    @timed
+    async def consult_panel(self, message_text: str):
+        """Ask several agents about the same message at once; each reply fills its own bubble as it arrives"""
+        if not message_text.strip() or not self.consult_steps:
+            return
+        
+        step_index = self.current_step
+        self.context_for(step_index)
+        messages = self.messages.setdefault(step_index, [])
+        messages.append(Message('user', message_text, datetime.now().strftime('%I:%M %p')))
+        self.context.append(step_index, 'user', message_text)
+        history = self.context.assemble(step_index)
+        self.step_progress[step_index] = self.progress_scorer.add(step_index, message_text)
+        self.prompt_ranker.observe(step_index, message_text)
+        if step_index == 0:
+            self.add_affinity_note(message_text)
+        
+        async def ask(agent: str, message: Message, bubble):
+            try:
+                message.content = await asyncio.wait_for(agent_backend.reply(agent, history[1:]), self.consult_timeout)
+                self.context.append(step_index, 'assistant', f'{agent}: {message.content}')
+                self.prompt_ranker.observe(step_index, message.content, user=False)
+            except AgentError:
+                message.content = f'The {agent} is unavailable right now.'
+            except asyncio.TimeoutError:
+                message.content = f'The {agent} did not answer within {self.consult_timeout:.0f} seconds.'
+            message.timestamp = datetime.now().strftime('%I:%M %p')
+            if not bubble.is_deleted:  # the chat may have been re-rendered meanwhile
+                bubble.set_text(message.content)
+        
+        # Placeholder bubbles go out right away; the slowest agent bounds the total wait
+        calls = []
+        with self.chat_container:
+            self.create_message_bubble(messages[-1])
+            for index in self.consult_steps:
+                agent = self.design_steps[index].agent
+                placeholder = Message('agent', f'{agent} is thinking...', datetime.now().strftime('%I:%M %p'), agent)
+                messages.append(placeholder)
+                calls.append(ask(agent, placeholder, self.create_message_bubble(placeholder)))
+        await asyncio.gather(*calls)
+        await self.update_progress_display()
+        await self.update_suggestions()
+
+    @timed
     async def update_chat_display(self):
         """Update the chat message display"""
-        if self.chat_container:
+        if self.chat_container and not self.chat_container.is_deleted:  # the user may have left the page meanwhile
             self.chat_container.clear()
             
             current_messages = self.messages.get(self.current_step, [])
@@ -183,8 +368,8 @@ class DesignThinkingPlatform:
                 for message in current_messages:
                     self.create_message_bubble(message)
 
-    def create_message_bubble(self, message: Message):
-        """Create a message bubble for chat display"""
+    def create_message_bubble(self, message: Message) -> ui.label:
+        """Create a message bubble for chat display and return its text label"""
         is_user = message.type == 'user'
         
         with ui.row().classes('w-full justify-end' if is_user else 'w-full justify-start'):
@@ -192,16 +377,17 @@ class DesignThinkingPlatform:
                 ui.avatar('🤖', size='sm').classes('bg-gray-100')
             
             with ui.column().classes('max-w-md'):
-                ui.label(message.timestamp).classes('text-xs text-gray-500 mb-1')
+                ui.label(f'{message.agent} · {message.timestamp}' if message.agent else message.timestamp).classes('text-xs text-gray-500 mb-1')
                 
                 with ui.card().classes(
                     'p-3 ' + 
                     ('bg-blue-600 text-white' if is_user else 'bg-white shadow-sm')
                 ):
-                    ui.label(message.content).classes('text-sm leading-relaxed')
+                    content = ui.label(message.content).classes('text-sm leading-relaxed')
             
             if is_user:
                 ui.avatar('👤', size='sm').classes('bg-blue-600 text-white')
+        return content
 
     async def update_header(self):
         """Update the header with current step info"""
@@ -213,10 +399,100 @@ class DesignThinkingPlatform:
         # This would update the chat input placeholder
         pass
 
+    async def update_suggestions(self):
+        """Show the best ranked prompts of the current step; only changed buttons are sent"""
+        ranked = self.prompt_ranker.top(self.current_step)
+        for button, prompt in zip(self.suggestion_buttons, ranked):
+            if not button.is_deleted and button.text != prompt:
+                button.set_text(prompt)
+
+    def add_affinity_note(self, note: str):
+        """Show a new Empathize note in its nearest group and re-cluster in the background"""
+        self.affinity_map.add(note)
+        self.update_affinity_map()
+        spawn(self.refresh_affinity_map())
+
+    async def refresh_affinity_map(self):
+        if await self.affinity_map.refresh():
+            self.update_affinity_map()
+
+    def update_affinity_map(self):
+        """Render the affinity map groups"""
+        if self.affinity_container is None or self.affinity_container.is_deleted:
+            return
+        self.affinity_container.clear()
+        with self.affinity_container:
+            for title, notes in self.affinity_map.groups():
+                with ui.column().classes('gap-1'):
+                    ui.label(f'{title} ({len(notes)})').classes('text-sm font-medium text-gray-800')
+                    for note in notes:
+                        ui.label(note).classes('text-xs text-gray-600 bg-yellow-50 rounded px-2 py-1')
+
+    def post_idea(self, idea_input: ui.input):
+        """Put a sticky note near the middle of what this user sees of the board"""
+        text = (idea_input.value or '').strip()
+        if not text:
+            return
+        idea_input.value = ''
+        x, y, width, height = self.board_view.viewport or (0, 0, 800, 320)
+        if self.board.post(text, x + width / 2 + random.uniform(-200, 120),
+                           y + height / 2 + random.uniform(-60, 20)) is None:
+            ui.notify('The board is full', type='warning')
+
+    def copy_invite_link(self):
+        """Put the link that joins this ideation board on the clipboard"""
+        ui.run_javascript(f'navigator.clipboard.writeText(location.origin + "/?board={self.board.key}")')
+        ui.notify('Invite link copied: anyone with it can post and vote on this board')
+
+    def update_artifacts(self):
+        """Render the attached files with their upload and indexing state"""
+        if self.artifact_container is None or self.artifact_container.is_deleted:
+            return
+        self.artifact_container.clear()
+        with self.artifact_container:
+            for artifact in self.artifacts.artifacts:
+                state = {
+                    'uploading': 'uploading...',
+                    'indexing': f'indexing {artifact.progress:.0%}, {artifact.passages} passages',
+                    'ready': f'{artifact.passages} passages',
+                    'failed': artifact.error,
+                }[artifact.status]
+                with ui.column().classes('gap-0'):
+                    ui.label(artifact.name).classes('text-sm text-gray-800')
+                    ui.label(f'{artifact.size / 2**20:.1f} MB · {state}').classes(
+                        'text-xs ' + ('text-red-600' if artifact.status == 'failed' else 'text-gray-500'))
+
+    async def search_artifacts(self, query: str, message_input: ui.input):
+        """Show the attached passages matching the search; clicking one quotes it into the message"""
+        hits = await run.io_bound(self.artifacts.search, query or '')
+        if hits is None or self.artifact_results.is_deleted:
+            return
+        self.artifact_results.clear()
+        with self.artifact_results:
+            for hit in hits:
+                with ui.column().classes('w-full p-2 gap-0 rounded cursor-pointer hover:bg-gray-100') as result:
+                    ui.label(hit.section).classes('text-xs text-gray-500')
+                    ui.label(hit.text).classes('text-xs text-gray-800 line-clamp-2')
+                result.on('click', lambda h=hit: self.cite_artifact(h, message_input))
+
+    def cite_artifact(self, hit: SearchHit, message_input: ui.input):
+        message_input.value = f'{message_input.value or ""} {cite(hit)}'.strip()
+        self.artifact_results.clear()
+
     async def update_progress_display(self):
-        """Update progress indicators"""
-        # This would update progress bars and percentages
-        pass
+        """Update the progress bars, completion icons and badges in place; only changed steps are sent"""
+        if self.progress_badge is None or self.progress_badge.is_deleted:  # the user may have left the page
+            return
+        self.progress_badge.set_text(f'{self.step_progress[self.current_step]}% Complete')
+        for progress, elements in zip(self.step_progress, self.progress_cards):
+            if elements['badge'].text == f'{progress}%':
+                continue
+            complete = progress == 100
+            elements['bar'].set_value(progress / 100)
+            elements['icon'].set_name('check_circle' if complete else 'radio_button_unchecked')
+            elements['icon'].classes(replace='text-green-500' if complete else 'text-gray-300')
+            elements['badge'].set_text(f'{progress}%')
+            elements['badge'].classes(replace='bg-green-100 text-green-800' if complete else 'bg-gray-100 text-gray-800')
 
     def create_step_card(self, step: DesignStep, index: int):
         """Create a step card for the sidebar"""
@@ -230,7 +506,7 @@ class DesignThinkingPlatform:
         else:
             card_classes += 'border-transparent hover:border-gray-200'
         
-        with ui.card().classes(card_classes).on('click', lambda idx=index: asyncio.create_task(self.switch_step(idx))):
+        with ui.card().classes(card_classes).on('click', lambda idx=index: spawn(self.switch_step(idx), key='switch_step')):
             with ui.card_section():
                 with ui.row().classes('items-center mb-3'):
                     # Step icon
@@ -247,12 +523,13 @@ class DesignThinkingPlatform:
                     
                     # Completion status
                     if is_completed:
-                        ui.icon('check_circle').classes('text-green-500')
+                        icon = ui.icon('check_circle').classes('text-green-500')
                     else:
-                        ui.icon('radio_button_unchecked').classes('text-gray-300')
+                        icon = ui.icon('radio_button_unchecked').classes('text-gray-300')
                 
                 # Progress bar
-                ui.linear_progress(value=progress/100).classes('mb-3')
+                bar = ui.linear_progress(value=progress/100).classes('mb-3')
+                self.progress_cards.append({'icon': icon, 'bar': bar})
                 
                 # Description
                 ui.label(step.description).classes('text-xs text-gray-600 leading-relaxed')
@@ -272,7 +549,7 @@ class DesignThinkingPlatform:
         ui.page_title('Design Thinking Platform')
         
         # Custom CSS for better styling
-        ui.add_head_html('''
+        add_head_html_once('''
         <style>
         .gradient-pink { background: linear-gradient(135deg, #ec4899, #db2777); }
         .gradient-purple { background: linear-gradient(135deg, #a855f7, #9333ea); }
@@ -299,6 +576,7 @@ class DesignThinkingPlatform:
                     # Steps list
                     with ui.scroll_area().classes('flex-1 p-4'):
                         with ui.column().classes('space-y-3'):
+                            self.progress_cards = []
                             for i, step in enumerate(self.design_steps):
                                 self.create_step_card(step, i)
             
@@ -322,9 +600,23 @@ class DesignThinkingPlatform:
                                                 ui.label(f'Chat with {current_step.agent}').classes('text-gray-600 text-sm')
                                         
                                         with ui.row().classes('items-center space-x-4'):
-                                            ui.badge(f'{self.step_progress[self.current_step]}% Complete').classes('bg-blue-100 text-blue-800')
+                                            self.progress_badge = ui.badge(f'{self.step_progress[self.current_step]}% Complete').classes('bg-blue-100 text-blue-800')
                                             ui.avatar('🤖', size='md').classes('bg-blue-100')
                             
+                            # Ideation board, shared with everyone who opens its invite link
+                            with ui.column().classes('w-full px-6 pt-4 gap-2') \
+                                    .bind_visibility_from(self, 'current_step', backward=lambda step: step == 2):
+                                with ui.row().classes('w-full items-center gap-2'):
+                                    idea_input = ui.input(placeholder='Post an idea to the board...') \
+                                        .props(f'maxlength={MAX_NOTE_LENGTH}').classes('flex-1')
+                                    ui.button('Post', icon='sticky_note_2',
+                                              on_click=lambda: self.post_idea(idea_input)).props('unelevated dense')
+                                    idea_input.on('keydown.enter', lambda: self.post_idea(idea_input))
+                                    if self.board.key:
+                                        ui.button(icon='link', on_click=self.copy_invite_link) \
+                                            .props('flat dense round').tooltip('Copy invite link')
+                                self.board_view = BoardView(self.board).classes('w-full h-80')
+                            
                             # Chat messages
                             with ui.scroll_area().classes('flex-1 p-6 bg-gray-50'):
                                 self.chat_container = ui.column().classes('space-y-6')
@@ -342,23 +634,45 @@ class DesignThinkingPlatform:
                                         ).classes('flex-1')
                                         
                                         async def send_handler():
-                                            await self.send_message(message_input.value)
+                                            text = message_input.value
                                             message_input.value = ''
+                                            if self.consult_mode:
+                                                await self.consult_panel(text)
+                                            else:
+                                                await self.send_message(text)
                                         
-                                        ui.button('Send', icon='send', on_click=send_handler).props('unelevated')
+                                        ui.button('Send', icon='send', on_click=lambda: spawn(send_handler())).props('unelevated')
                                         
                                         # Handle Enter key
-                                        message_input.on('keydown.enter', send_handler)
+                                        message_input.on('keydown.enter', lambda: spawn(send_handler()))
+                                    
+                                    # Consult panel: several agents answer the same message
+                                    with ui.row().classes('items-center gap-3 mb-4'):
+                                        ui.switch('Consult panel').bind_value(self, 'consult_mode').props('dense')
+                                        ui.select(
+                                            {i: step.agent for i, step in enumerate(self.design_steps)},
+                                            multiple=True,
+                                        ).bind_value(self, 'consult_steps').bind_visibility_from(self, 'consult_mode') \
+                                            .props('dense use-chips').classes('flex-1')
+                                    
+                                    # Passages of the attached research, quoted into the message with their source
+                                    artifact_search = ui.input(placeholder='Search attached research to cite...') \
+                                        .props('dense clearable').classes('w-full')
+                                    artifact_search.on('update:model-value',
+                                                       lambda e: self.search_artifacts(e.args, message_input),
+                                                       throttle=0.2, leading_events=False)
+                                    self.artifact_results = ui.column().classes('w-full gap-1 mb-4')
                                     
                                     # Quick questions
                                     ui.label('Suggested prompts:').classes('text-xs text-gray-600 mb-2 font-medium')
                                     with ui.row().classes('flex-wrap gap-2'):
-                                        current_step = self.get_current_step()
-                                        for question in current_step.questions:
+                                        self.suggestion_buttons = [
                                             ui.button(
                                                 question, 
-                                                on_click=lambda q=question: setattr(message_input, 'value', q)
+                                                on_click=lambda e: setattr(message_input, 'value', e.sender.text)
                                             ).props('flat dense').classes('text-xs rounded-full')
+                                            for question in self.prompt_ranker.top(self.current_step)
+                                        ]
                     
                     # Right panel - Insights
                     with splitter.after:
@@ -377,11 +691,31 @@ class DesignThinkingPlatform:
                                                 for i, step in enumerate(self.design_steps):
                                                     with ui.row().classes('items-center justify-between'):
                                                         ui.label(step.name).classes('text-sm text-gray-600')
-                                                        ui.badge(f'{self.step_progress[i]}%').classes(
+                                                        self.progress_cards[i]['badge'] = ui.badge(f'{self.step_progress[i]}%').classes(
                                                             'bg-green-100 text-green-800' if self.step_progress[i] == 100 
                                                             else 'bg-gray-100 text-gray-800'
                                                         )
                                     
+                                    # Affinity map of the Empathize notes, shown while empathizing and defining
+                                    with ui.card().bind_visibility_from(self, 'current_step', backward=lambda step: step <= 1):
+                                        with ui.card_section().classes('p-4'):
+                                            ui.label('Affinity Map').classes('font-medium text-gray-900 mb-4')
+                                            self.affinity_container = ui.column().classes('space-y-3')
+                                            self.update_affinity_map()
+                                    
+                                    # Research artifacts: transcripts, CSVs and PDFs stream to disk and are indexed in the background
+                                    with ui.card():
+                                        with ui.card_section().classes('p-4'):
+                                            ui.label('Research Artifacts').classes('font-medium text-gray-900 mb-4')
+                                            # a plain q-uploader: ui.upload would register an upload route per page build
+                                            ui.element('q-uploader').props(
+                                                f'label="Attach transcripts, CSVs or PDFs" url={self.artifacts.url} '
+                                                f'send-raw auto-upload multiple accept={ACCEPT} max-file-size={MAX_UPLOAD_BYTES} flat bordered'
+                                            ).props(':headers="files => [{name: \'X-Filename\', value: encodeURIComponent(files[0].name)}]"') \
+                                                .classes('w-full')
+                                            self.artifact_container = ui.column().classes('space-y-2 mt-3')
+                                            self.update_artifacts()
+                                    
                                     # Key Insights
                                     with ui.card():
                                         with ui.card_section().classes('p-4'):
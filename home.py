@@ -1,19 +1,49 @@
 # main.py
-from nicegui import ui, app
-from typing import Dict, Callable
+from nicegui import ui, app, Client
+from typing import Dict, Callable, Optional
+from dataclasses import dataclass, field
+import os
 from page1 import create_page1
 from page2 import create_page2
 from page3 import create_page3
 from home1 import FloatingMenuApp1 as Home1App
 from home2 import setup_page_home2
 from landing import setup_page
-from design_thinking_platform import DesignThinkingPlatform as DTP
-from onboarding import DesignThinkingApp1 as OnboardingApp
-from slider import CardSlider as SliderApp
+from design_thinking_platform import DesignThinkingPlatform as DTP, DesignThinkingState
+from onboarding import DesignThinkingApp1 as OnboardingApp, OnboardingState
+from slider import CardSlider as SliderApp, SliderState
+from page_utils import add_head_html_once
+from session_manager import SessionManager
+from metrics import metrics, timed
+from render_stats import render_stats
+from profiling import profiler, profiled
+from loop_monitor import loop_monitor
+import task_supervisor
+from agents import agent_backend
+from ideation import Board, boards
+import artifacts
+
+# Per-browser app state, kept warm across reconnects for a grace period and then evicted
+sessions = SessionManager(grace_period=float(os.environ.get('SESSION_GRACE_PERIOD', '120')))
+# How long a dropped websocket may stay away and still resume by replaying missed messages
+RECONNECT_TIMEOUT = float(os.environ.get('RECONNECT_TIMEOUT', '30'))
+# Send every onboarding stage once and switch stages in the browser instead of on the server
+ONBOARDING_CLIENT_NAVIGATION = os.environ.get('ONBOARDING_CLIENT_NAVIGATION', '0') == '1'
+
+@dataclass
+class MenuState:
+    """Plain per-browser state, shared by all tabs of the browser through the session"""
+    current_page: str = 'page1'
+    board: str = ''  # key of the ideation board this browser last joined
+    design_thinking: DesignThinkingState = field(default_factory=DesignThinkingState)
+    onboarding: OnboardingState = field(default_factory=OnboardingState)
+    slider: SliderState = field(default_factory=SliderState)
 
 class FloatingMenuApp:
-    def __init__(self):
-        self.current_page = 'page1'
+    def __init__(self, state: Optional[MenuState] = None, board: Optional[Board] = None):
+        # The pages and containers below belong to one client; only `state` and the ideation board
+        # (which keeps a view per client) may be shared between tabs
+        self.state = state or MenuState()
         self.pages: Dict[str, Callable] = {
             'page1': create_page1,
             'page2': create_page2,
@@ -21,21 +51,28 @@ class FloatingMenuApp:
             'Home1': Home1App().run_home1,
             'Home2': setup_page_home2,
             'Landing': setup_page,
-            'Design Thinking': DTP().build_ui,
-            'Onboarding': OnboardingApp().create_ui,
-            'Slider': SliderApp().create_ui,
+            'Design Thinking': DTP(board, self.state.design_thinking).build_ui,
+            'Onboarding': OnboardingApp(ONBOARDING_CLIENT_NAVIGATION, self.state.onboarding).create_ui,
+            'Slider': SliderApp(state=self.state.slider).create_ui,
             'Index': self.show_index,
             # Easy to add more pages here:
             # 'page4': create_page4,
             # 'page5': create_page5,
         }
         self.content_container = None
-        self.setup_app()
+
+    @property
+    def current_page(self) -> str:
+        return self.state.current_page
+
+    @current_page.setter
+    def current_page(self, page_key: str):
+        self.state.current_page = page_key
 
     def setup_app(self):
         """Initialize the app with custom CSS and main layout"""
         # Custom CSS for floating menu and smooth transitions
-        ui.add_head_html('''
+        add_head_html_once('''
         <style>
             .floating-menu {
                 position: fixed;
@@ -98,12 +135,16 @@ class FloatingMenuApp:
                     on_click=lambda p=page_key: self.navigate_to(p)
                 ).classes(f'menu-button').props(f'color={button_color} rounded')
 
+    @timed
+    @profiled
     def navigate_to(self, page_key: str):
         """Navigate to a specific page"""
         if page_key in self.pages:
             self.current_page = page_key
+            render_stats.set_page(page_key)
             self.refresh_content()
 
+    @timed
     def refresh_content(self):
         """Refresh the main content area"""
         if self.content_container:
@@ -118,11 +159,11 @@ class FloatingMenuApp:
                 ui.html('<h1 style="color: #667eea; margin-bottom: 20px;">📑 Index</h1>')
                 ui.link('Open index.html', '/static/index.html', new_tab=True).classes('text-blue-500 hover:text-blue-700')
 
+    @timed
     def run(self):
-        """Run the application"""
-        # Set up static files
-        app.add_static_files('/static', 'static')
-        
+        """Build the application layout for the current client"""
+        self.setup_app()
+
         # Create main layout
         with ui.column().classes('w-full min-h-screen'):
             # Floating menu
@@ -135,10 +176,50 @@ class FloatingMenuApp:
             with self.content_container:
                 self.pages[self.current_page]()
 
+@ui.page('/', reconnect_timeout=RECONNECT_TIMEOUT)
+def index(client: Client, debug: bool = False, profile: bool = False, board: str = ''):
+    """Each tab builds its own app; the browser's plain state is restored within the grace period.
+
+    `debug` shows the render overlay when the server runs with RENDER_STATS=1.
+    `board` is the key of an invite link to a shared ideation board; unknown keys get a new board.
+    A websocket that comes back within RECONNECT_TIMEOUT resumes the same client: NiceGUI replays
+    only the messages after the browser's last seen message id instead of rebuilding the page.
+    """
+    state = sessions.get(client, 'menu', MenuState)
+    ideation_board = boards.join(sessions.session_for(client).token, board or state.board)
+    if board and ideation_board.key != board:
+        ui.notify('That board link is no longer valid, you are on a new board', type='warning')
+    state.board = ideation_board.key
+    app_instance = FloatingMenuApp(state, ideation_board)
+    render_stats.set_page(app_instance.current_page)
+    if profile and profiler.enabled:
+        profiler.flag(client)
+    app_instance.run()
+    if debug and render_stats.enabled:
+        render_stats.overlay()
+
 # Create and run the app
 if __name__ in {"__main__", "__mp_main__"}:
-    app_instance = FloatingMenuApp()
-    app_instance.run()
+    # Set up static files
+    app.add_static_files('/static', 'static')
+    sessions.install()
+    task_supervisor.install()
+    agent_backend.install()
+    boards.install()
+    sessions.on_expire(lambda session: boards.leave(session.token))
+    artifacts.install()
+    if os.environ.get('METRICS', '1') != '0':
+        metrics.install()
+        metrics.add_collector(lambda: [f'app_{key} {value}' for key, value in sessions.stats().items()])
+        if os.environ.get('RENDER_STATS', '0') == '1':  # serializes every outgoing message a second time
+            render_stats.install()
+        loop_monitor.threshold = float(os.environ.get('LOOP_LAG_THRESHOLD', '0.1'))
+        loop_monitor.install()
+    if os.environ.get('PROFILING', '0') == '1':
+        profiler.sample_rate = float(os.environ.get('PROFILE_SAMPLE_RATE', '0.01'))
+        profiler.max_captures = int(os.environ.get('PROFILE_MAX_CAPTURES', '50'))
+        profiler.max_bytes = int(os.environ.get('PROFILE_MAX_MB', '200')) * 2**20
+        profiler.install()
     
     # Run the NiceGUI app
     ui.run(
@@ -147,5 +228,7 @@ if __name__ in {"__main__", "__mp_main__"}:
         host='0.0.0.0',
         port=8080,
         reload=False,
-        show=False
-    )
\ No newline at end of file
+        show=False,
+        storage_secret=os.environ.get('STORAGE_SECRET'),
+        message_history_length=int(os.environ.get('MESSAGE_HISTORY_LENGTH', '1000')),
+    )
@@ -1,5 +1,6 @@
 from nicegui import ui, app
 import asyncio
+from page_utils import add_head_html_once
 
 def create_navigation_card():
     """Create a floating navigation card"""
@@ -28,7 +29,7 @@ def setup_page_home2():
     ui.page_title('FastInnovation - Navigation')
     
     # Add custom CSS for better styling
-    ui.add_head_html('''
+    add_head_html_once('''
     <style>
         body { 
             background: white;
@@ -0,0 +1,266 @@
+"""
+Shared ideation board for the Ideate step, where participants post, move and vote on sticky notes.
+Notes live in a spatial grid; every browser reports its viewport and receives only the notes inside
+it. Changes are collected and flushed a few times per second as compact deltas (see
+ideation_board.js), so a note dragged across the board costs one small array per flush and only for
+the browsers that can see it.
+Boards are shared through an unguessable key issued by the server (the invite link is /?board=<key>),
+with capped note count and text length and one vote per browser view and note.
+"""
+
+import asyncio
+import math
+import secrets
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from nicegui import background_tasks
+from nicegui.element import Element
+from nicegui.events import GenericEventArguments
+
+from metrics import metrics
+
+CELL = 256  # grid cell size in board pixels
+MARGIN = 256  # notes this close to the viewport are sent too, so short scrolls need no round trip
+NOTE_WIDTH, NOTE_HEIGHT = 160, 80
+MAX_NOTE_LENGTH = 280  # characters
+MAX_NOTES = 1000  # per board
+COLORS = ['#fef08a', '#fbcfe8', '#bbf7d0', '#bfdbfe', '#fed7aa']
+
+Rect = Tuple[float, float, float, float]  # x, y, width, height
+
+
+def finite_numbers(args, count: int) -> Optional[List[float]]:
+    """`count` finite numbers sent by a browser, or None for anything else"""
+    if not isinstance(args, (list, tuple)) or len(args) != count:
+        return None
+    if not all(isinstance(arg, (int, float)) and not isinstance(arg, bool) and math.isfinite(arg) for arg in args):
+        return None
+    return [float(arg) for arg in args]
+
+
+@dataclass
+class Note:
+    id: int
+    text: str
+    x: int
+    y: int
+    color: str
+    votes: int = 0
+
+    def full(self) -> list:
+        return [self.id, self.x, self.y, self.votes, self.text, self.color]
+
+    def compact(self) -> list:
+        return [self.id, self.x, self.y, self.votes]
+
+
+class BoardView(Element, component='ideation_board.js'):
+    """One browser's view of the board"""
+
+    def __init__(self, board: 'Board'):
+        super().__init__()
+        self.board = board
+        self._props['width'] = board.width
+        self._props['height'] = board.height
+        self.viewport: Optional[Rect] = None  # unknown until the browser shows the board
+        self.shown: Set[int] = set()  # notes this browser currently holds
+        self.voted: Set[int] = set()
+        self.on('viewport', self.handle_viewport)
+        self.on('move', self.handle_move)
+        self.on('vote', lambda e: board.vote(self, e.args))
+        board.attach(self)
+
+    def handle_viewport(self, e: GenericEventArguments):
+        viewport = finite_numbers(e.args, 4)
+        if viewport is not None:
+            self.board.set_viewport(self, viewport)
+
+    def handle_move(self, e: GenericEventArguments):
+        if not isinstance(e.args, list) or len(e.args) != 3 or type(e.args[0]) is not int:
+            return
+        position = finite_numbers(e.args[1:], 2)
+        if position is not None:
+            self.board.move(e.args[0], *position)
+
+    def send(self, deltas: List[list]):
+        self.run_method('apply', deltas)
+        self.board.deltas_sent += len(deltas)
+
+    def _handle_delete(self):
+        self.board.detach(self)
+        super()._handle_delete()
+
+
+class Board:
+    def __init__(self, width: int = 4000, height: int = 3000, flush_interval: float = 0.1,
+                 max_notes: int = MAX_NOTES, key: str = ''):
+        self.key = key
+        self.width = width
+        self.height = height
+        self.flush_interval = flush_interval
+        self.max_notes = max_notes
+        self.notes: Dict[int, Note] = {}
+        self.cells: Dict[Tuple[int, int], Set[int]] = {}
+        self.views: List[BoardView] = []
+        self.dirty: Set[int] = set()
+        self.next_id = 1
+        self.flushes = 0
+        self.deltas_sent = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def cell_of(x: float, y: float) -> Tuple[int, int]:
+        return int(x // CELL), int(y // CELL)
+
+    def clamp(self, x: float, y: float) -> Tuple[int, int]:
+        return (int(min(max(x, 0), self.width - NOTE_WIDTH)), int(min(max(y, 0), self.height - NOTE_HEIGHT)))
+
+    def post(self, text: str, x: float, y: float) -> Optional[Note]:
+        """Add a note, cut to MAX_NOTE_LENGTH; None if the board is full"""
+        if len(self.notes) >= self.max_notes:
+            return None
+        text = text[:MAX_NOTE_LENGTH]
+        x, y = self.clamp(x, y)
+        note = Note(self.next_id, text, x, y, COLORS[zlib.crc32(text.encode()) % len(COLORS)])
+        self.next_id += 1
+        self.notes[note.id] = note
+        self.cells.setdefault(self.cell_of(x, y), set()).add(note.id)
+        self.dirty.add(note.id)
+        return note
+
+    def move(self, note_id: int, x: float, y: float):
+        note = self.notes.get(note_id)
+        if note is None:
+            return
+        x, y = self.clamp(x, y)
+        old, new = self.cell_of(note.x, note.y), self.cell_of(x, y)
+        if old != new:
+            self.cells[old].discard(note_id)
+            self.cells.setdefault(new, set()).add(note_id)
+        note.x, note.y = x, y
+        self.dirty.add(note_id)
+
+    def vote(self, view: BoardView, note_id: int):
+        """Count a view's first vote on a note; repeated votes are ignored"""
+        note = self.notes.get(note_id) if isinstance(note_id, int) else None
+        if note is not None and note_id not in view.voted:
+            view.voted.add(note_id)
+            note.votes += 1
+            self.dirty.add(note_id)
+
+    def query(self, rect: Rect) -> Set[int]:
+        """Notes overlapping a rectangle"""
+        x, y, width, height = rect
+        left, top = self.cell_of(x - NOTE_WIDTH, y - NOTE_HEIGHT)
+        right, bottom = self.cell_of(x + width, y + height)
+        return {note_id
+                for cx in range(left, right + 1)
+                for cy in range(top, bottom + 1)
+                for note_id in self.cells.get((cx, cy), ())
+                if self.inside(self.notes[note_id], rect)}
+
+    @staticmethod
+    def inside(note: Note, rect: Rect) -> bool:
+        x, y, width, height = rect
+        return x - NOTE_WIDTH < note.x < x + width and y - NOTE_HEIGHT < note.y < y + height
+
+    def set_viewport(self, view: BoardView, viewport):
+        """Send the notes that came into view and drop the ones that left it"""
+        x, y, width, height = viewport
+        # the rect comes from the browser: keep it on the board so query() walks a bounded number of cells
+        x, y = min(max(x, 0), self.width), min(max(y, 0), self.height)
+        width, height = min(max(width, 0), self.width - x), min(max(height, 0), self.height - y)
+        view.viewport = (x - MARGIN, y - MARGIN, width + 2 * MARGIN, height + 2 * MARGIN)
+        visible = self.query(view.viewport)
+        deltas = [self.notes[note_id].full() for note_id in sorted(visible - view.shown)]
+        deltas += [[note_id] for note_id in sorted(view.shown - visible)]
+        view.shown = visible
+        if deltas:
+            view.send(deltas)
+
+    def attach(self, view: BoardView):
+        self.views.append(view)
+        if self._task is None or self._task.done():
+            self._task = background_tasks.create(self.run(), name='ideation board')
+
+    def detach(self, view: BoardView):
+        if view in self.views:
+            self.views.remove(view)
+
+    @metrics.timed('Board.flush')
+    def flush(self):
+        """Send every view the changed notes it can see"""
+        if not self.dirty:
+            return
+        self.flushes += 1
+        changed = [self.notes[note_id] for note_id in sorted(self.dirty)]
+        self.dirty.clear()
+        for view in self.views:
+            if view.viewport is None:
+                continue
+            deltas = []
+            for note in changed:
+                if self.inside(note, view.viewport):
+                    deltas.append(note.compact() if note.id in view.shown else note.full())
+                    view.shown.add(note.id)
+                elif note.id in view.shown:
+                    deltas.append([note.id])
+                    view.shown.discard(note.id)
+            if deltas:
+                view.send(deltas)
+
+    async def run(self):
+        while self.views:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+
+class Boards:
+    """Ideation boards by share key; a board lives as long as a session that joined it"""
+
+    def __init__(self):
+        self.boards: Dict[str, Board] = {}
+        self.members: Dict[str, Set[str]] = {}  # board key -> session tokens
+        self.deltas_sent = 0  # of boards already dropped
+
+    def join(self, session: str, key: str = '') -> Board:
+        """The board behind `key` if the server issued it and it is still alive, otherwise a new board"""
+        board = self.boards.get(key) if key else None
+        if board is None:
+            key = secrets.token_urlsafe(12)
+            board = self.boards[key] = Board(key=key)
+            self.members[key] = set()
+        self.members[key].add(session)
+        return board
+
+    def leave(self, session: str):
+        """Drop the session from its boards and free the boards nobody holds any more"""
+        for key, members in list(self.members.items()):
+            members.discard(session)
+            if not members:
+                del self.members[key]
+                self.deltas_sent += self.boards.pop(key).deltas_sent
+
+    def collect(self):
+        boards = list(self.boards.values())
+        yield '# HELP app_boards Ideation boards held in memory'
+        yield '# TYPE app_boards gauge'
+        yield f'app_boards {len(boards)}'
+        yield '# HELP app_board_notes Sticky notes on all ideation boards'
+        yield '# TYPE app_board_notes gauge'
+        yield f'app_board_notes {sum(len(board.notes) for board in boards)}'
+        yield '# HELP app_board_views Browsers showing an ideation board'
+        yield '# TYPE app_board_views gauge'
+        yield f'app_board_views {sum(len(board.views) for board in boards)}'
+        yield '# HELP app_board_deltas_total Note deltas sent to browsers'
+        yield '# TYPE app_board_deltas_total counter'
+        yield f'app_board_deltas_total {self.deltas_sent + sum(board.deltas_sent for board in boards)}'
+
+    def install(self):
+        metrics.add_collector(self.collect)
+        return self
+
+
+boards = Boards()
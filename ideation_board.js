@@ -0,0 +1,81 @@
+// Sticky note canvas of the ideation board.
+// The server sends only the notes inside the reported viewport, as deltas:
+//   [id]                            note left the viewport
+//   [id, x, y, votes]               position or votes changed
+//   [id, x, y, votes, text, color]  note entered the viewport
+export default {
+  template: `
+    <div ref="viewport" class="relative overflow-auto bg-gray-50 rounded" @scroll="reportViewport">
+      <div class="relative" :style="{ width: width + 'px', height: height + 'px' }">
+        <div v-for="note in notes" :key="note.id"
+             class="absolute w-40 p-2 rounded shadow text-xs cursor-move select-none"
+             :style="{ left: note.x + 'px', top: note.y + 'px', background: note.color }"
+             @pointerdown="startDrag($event, note)">
+          <div class="whitespace-pre-wrap break-words">{{ note.text }}</div>
+          <button class="mt-1 text-gray-700" @pointerdown.stop @click="$emit('vote', note.id)">▲ {{ note.votes }}</button>
+        </div>
+      </div>
+    </div>
+  `,
+  props: {
+    width: Number,
+    height: Number,
+    move_interval: { type: Number, default: 80 },
+  },
+  data() {
+    return { notes: {} };
+  },
+  mounted() {
+    // reports the viewport once the board becomes visible and whenever it is resized
+    this.resizeObserver = new ResizeObserver(() => this.reportViewport());
+    this.resizeObserver.observe(this.$refs.viewport);
+  },
+  unmounted() {
+    this.resizeObserver.disconnect();
+  },
+  methods: {
+    apply(deltas) {
+      for (const [id, x, y, votes, text, color] of deltas) {
+        if (x === undefined) {
+          delete this.notes[id];
+        } else if (text !== undefined) {
+          this.notes[id] = { id, x, y, votes, text, color };
+        } else if (this.notes[id] && this.notes[id] !== this.dragged) {
+          Object.assign(this.notes[id], { x, y, votes });
+        }
+      }
+    },
+    reportViewport() {
+      const element = this.$refs.viewport;
+      if (!element.clientWidth || this.viewportPending) return;
+      this.viewportPending = true;
+      setTimeout(() => {
+        this.viewportPending = false;
+        this.$emit("viewport", [element.scrollLeft, element.scrollTop, element.clientWidth, element.clientHeight]);
+      }, 100);
+    },
+    startDrag(event, note) {
+      const startX = event.clientX - note.x;
+      const startY = event.clientY - note.y;
+      let lastSent = 0;
+      this.dragged = note;
+      const send = () => {
+        lastSent = Date.now();
+        this.$emit("move", [note.id, Math.round(note.x), Math.round(note.y)]);
+      };
+      const move = (e) => {
+        note.x = Math.max(0, Math.min(this.width - 160, e.clientX - startX));
+        note.y = Math.max(0, Math.min(this.height - 80, e.clientY - startY));
+        if (Date.now() - lastSent > this.move_interval) send();
+      };
+      const stop = () => {
+        window.removeEventListener("pointermove", move);
+        window.removeEventListener("pointerup", stop);
+        this.dragged = null;
+        send();
+      };
+      window.addEventListener("pointermove", move);
+      window.addEventListener("pointerup", stop);
+    },
+  },
+};
@@ -1,10 +1,15 @@
 from nicegui import ui, app
 import asyncio
+from page_utils import add_head_html_once
+from pathlib import Path
+
+# Serve the images once; passing a local file path to ui.image registers a new route on every render
+app.add_static_files('/images', Path(__file__).parent / 'images')
 
 def create_main_content():
     with ui.grid(columns=16).classes('w-full gap-0'):
         ui.label('').classes('col-span-3')
-        ui.image('images/FastInnovation_logo.png').classes('col-span-2 w-[250px] h-[250px]')
+        ui.image('/images/FastInnovation_logo.png').classes('col-span-2 w-[250px] h-[250px]')
 
         with ui.row().classes('col-span-10'):
             # Main title
@@ -81,7 +86,7 @@ def setup_page():
     ui.page_title('FastInnovation - AI Agents Platform')
     
     # Add custom CSS for better styling
-    ui.add_head_html('''
+    add_head_html_once('''
     <style>
         body { 
             background: white;
@@ -0,0 +1,129 @@
+"""
+Event-loop lag watchdog.
+A heartbeat task measures scheduling delay continuously; a watchdog thread samples the loop thread's
+stack while the loop is blocked, so the code holding it up is caught in the act.
+"""
+
+import asyncio
+import contextlib
+import inspect
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from types import FrameType
+from typing import List, Optional, Tuple
+
+from nicegui import app, background_tasks
+
+from metrics import Histogram, metrics
+
+log = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1, max_stalls: int = 100):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = Histogram(len(metrics.buckets))
+        self.max_lag = 0.0
+        self.stalls = deque(maxlen=max_stalls)
+        self.stall_counts = {}
+        self.running: List[Tuple[str, FrameType]] = []  # timed sections and their frames, innermost last
+        self.last_beat = time.perf_counter()
+        self.loop_thread_id: Optional[int] = None
+        self.pending_sample: Optional[dict] = None
+        self.stopped = threading.Event()
+
+    def install(self):
+        """Start the heartbeat and watchdog with the app and export lag metrics"""
+        app.on_startup(self.start)
+        app.on_shutdown(self.stopped.set)
+        metrics.add_probe(self)
+        metrics.add_collector(self.collect)
+        return self
+
+    def start(self):
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.perf_counter()
+        background_tasks.create(self.heartbeat(), name='loop lag heartbeat')
+        threading.Thread(target=self.watch, name='loop lag watchdog', daemon=True).start()
+
+    def begin(self, label: str) -> Tuple[str, FrameType]:
+        # The frame that stays on the loop thread's stack while the section runs: the async wrapper
+        # itself (off the stack whenever it awaits), or the caller of a sync wrapper or timer block
+        frame = sys._getframe(1)
+        while (frame.f_code.co_name == '<listcomp>' or frame.f_code.co_flags & inspect.CO_GENERATOR
+               or frame.f_code.co_filename == contextlib.__file__):
+            frame = frame.f_back
+        token = (label, frame)
+        self.running.append(token)
+        return token
+
+    def end(self, label: str, token: Tuple[str, FrameType]):
+        for i in range(len(self.running) - 1, -1, -1):
+            if self.running[i] is token:
+                del self.running[i]
+                break
+
+    def blamed(self, frame: FrameType) -> Optional[str]:
+        """Innermost timed section whose frame is on the sampled stack; suspended coroutines are not"""
+        on_stack = set()
+        while frame is not None:
+            on_stack.add(id(frame))
+            frame = frame.f_back
+        for label, section_frame in reversed(list(self.running)):
+            if id(section_frame) in on_stack:
+                return label
+        return None
+
+    async def heartbeat(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.last_beat = now = time.perf_counter()
+            lag = max(0.0, now - start - self.interval)
+            metrics.record(self.lag, lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.threshold:
+                self.record_stall(lag)
+
+    def watch(self):
+        """Runs in a thread: sample the loop thread's stack once per stall while it is blocked"""
+        sampled_beat = None
+        while not self.stopped.wait(self.interval / 2):
+            blocked_for = time.perf_counter() - self.last_beat - self.interval
+            if blocked_for < self.threshold or sampled_beat == self.last_beat:
+                continue
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            sampled_beat = self.last_beat
+            self.pending_sample = {
+                'handler': self.blamed(frame),
+                'stack': ''.join(traceback.format_stack(frame, limit=30)),
+            }
+
+    def record_stall(self, lag: float):
+        sample, self.pending_sample = self.pending_sample, None
+        handler = (sample or {}).get('handler') or 'unknown'
+        stall = {'time': time.time(), 'lag': lag, 'handler': handler, 'stack': (sample or {}).get('stack', '')}
+        self.stalls.append(stall)
+        self.stall_counts[handler] = self.stall_counts.get(handler, 0) + 1
+        log.warning('event loop blocked for %.0f ms (handler: %s)\n%s', lag * 1000, handler, stall['stack'])
+
+    def collect(self):
+        yield from metrics.histogram_lines('app_event_loop_lag_seconds', 'Event loop scheduling delay',
+                                           'loop', {'main': self.lag})
+        yield '# HELP app_event_loop_lag_max_seconds Largest scheduling delay seen'
+        yield '# TYPE app_event_loop_lag_max_seconds gauge'
+        yield f'app_event_loop_lag_max_seconds {self.max_lag:.6f}'
+        yield '# HELP app_event_loop_stalls_total Scheduling delays above the threshold, by running handler'
+        yield '# TYPE app_event_loop_stalls_total counter'
+        for handler, count in sorted(self.stall_counts.items()):
+            yield f'app_event_loop_stalls_total{{handler="{handler}"}} {count}'
+
+
+loop_monitor = LoopMonitor()
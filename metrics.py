@@ -0,0 +1,194 @@
+"""
+Lightweight handler timing with a Prometheus text endpoint.
+Handlers are wrapped with @timed; while metrics are disabled the wrapper costs one attribute check.
+"""
+
+import functools
+import inspect
+import os
+import sys
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import PlainTextResponse
+from nicegui import app
+
+# Upper bounds in seconds, roughly the Prometheus client defaults
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOCAL_HOSTS = {'127.0.0.1', '::1', 'localhost', 'testclient'}
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count', 'errors')
+
+    def __init__(self, size: int):
+        self.counts = [0] * (size + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+
+
+class Metrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.enabled = False
+        self.allow_remote = False
+        self.buckets = tuple(buckets)
+        self.histograms: Dict[str, Histogram] = {}
+        self.collectors: List[Callable[[], Iterable[str]]] = []
+        self.probes = []
+
+    def observe(self, name: str, seconds: float, error: bool = False):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(len(self.buckets))
+        self.record(histogram, seconds)
+        if error:
+            histogram.errors += 1
+
+    def record(self, histogram: Histogram, seconds: float, buckets: Optional[Tuple[float, ...]] = None):
+        """Add a sample; histograms of something other than seconds pass their own bucket bounds"""
+        histogram.counts[bisect_left(buckets or self.buckets, seconds)] += 1
+        histogram.sum += seconds
+        histogram.count += 1
+
+    def histogram_lines(self, metric: str, help_text: str, label: str, histograms: Dict[str, Histogram],
+                        buckets: Optional[Tuple[float, ...]] = None):
+        """Prometheus text lines for a family of histograms keyed by one label"""
+        yield f'# HELP {metric} {help_text}'
+        yield f'# TYPE {metric} histogram'
+        for key, histogram in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip((buckets or self.buckets) + (float('inf'),), histogram.counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield f'{metric}_bucket{{{label}="{key}",le="{le}"}} {cumulative}'
+            yield f'{metric}_sum{{{label}="{key}"}} {histogram.sum:.6f}'
+            yield f'{metric}_count{{{label}="{key}"}} {histogram.count}'
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time a block of code under `name`"""
+        if not self.enabled:
+            yield
+            return
+        tokens = [probe.begin(name) for probe in self.probes]
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, error)
+            self.end_probes(name, tokens)
+
+    def timed(self, name=None):
+        """Decorator recording latency and call counts of a sync or async function.
+
+        Usable as @timed or @timed('name'); the default name is the function's qualified name.
+        """
+        if callable(name):
+            return self.timed()(name)
+
+        def decorator(func):
+            label = name or func.__qualname__
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await func(*args, **kwargs)
+                    tokens = [probe.begin(label) for probe in self.probes]
+                    start = time.perf_counter()
+                    error = False
+                    try:
+                        return await func(*args, **kwargs)
+                    except BaseException:
+                        error = True
+                        raise
+                    finally:
+                        self.observe(label, time.perf_counter() - start, error)
+                        self.end_probes(label, tokens)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                tokens = [probe.begin(label) for probe in self.probes]
+                start = time.perf_counter()
+                error = False
+                try:
+                    return func(*args, **kwargs)
+                except BaseException:
+                    error = True
+                    raise
+                finally:
+                    self.observe(label, time.perf_counter() - start, error)
+                    self.end_probes(label, tokens)
+            return wrapper
+        return decorator
+
+    def end_probes(self, label: str, tokens: list):
+        for probe, token in zip(self.probes, tokens):
+            probe.end(label, token)
+
+    def add_probe(self, probe):
+        """Register an object whose begin(label) and end(label, token) bracket every timed call"""
+        self.probes.append(probe)
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]):
+        """Register a function returning extra lines in Prometheus text format"""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines = list(self.histogram_lines('app_handler_duration_seconds', 'Handler latency', 'handler', self.histograms))
+        lines += [
+            '# HELP app_handler_calls_total Handler invocations',
+            '# TYPE app_handler_calls_total counter',
+        ]
+        lines += [f'app_handler_calls_total{{handler="{name}"}} {h.count}' for name, h in sorted(self.histograms.items())]
+        lines += [
+            '# HELP app_handler_errors_total Handler invocations that raised',
+            '# TYPE app_handler_errors_total counter',
+        ]
+        lines += [f'app_handler_errors_total{{handler="{name}"}} {h.errors}' for name, h in sorted(self.histograms.items())]
+        for collector in self.collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        self.histograms.clear()
+
+    def install(self, path: str = '/metrics', allow_remote: bool = False):
+        """Enable recording and serve the metrics, by default only to local requests"""
+        self.enabled = True
+        self.allow_remote = allow_remote
+        self.add_collector(process_lines)
+
+        @app.get(path, response_class=PlainTextResponse, include_in_schema=False)
+        def endpoint(request: Request):
+            if not (self.allow_remote or (request.client and request.client.host in LOCAL_HOSTS)):
+                return PlainTextResponse('forbidden\n', status_code=403)
+            return PlainTextResponse(self.render(), media_type='text/plain; version=0.0.4')
+        return self
+
+
+def process_lines():
+    """Resident memory of this worker"""
+    try:
+        with open('/proc/self/statm') as statm:
+            rss = int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):  # not Linux: fall back to the peak, reported in kB (bytes on macOS)
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    yield '# HELP process_resident_memory_bytes Resident memory size in bytes'
+    yield '# TYPE process_resident_memory_bytes gauge'
+    yield f'process_resident_memory_bytes {rss}'
+
+
+metrics = Metrics()
+timed = metrics.timed
@@ -1,9 +1,33 @@
 from nicegui import ui, app
 import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Optional, Set
+from search_index import SearchIndex
+from page_utils import add_head_html_once, on_once
+from metrics import timed
+from task_supervisor import spawn
+
+@dataclass
+class OnboardingState:
+    """Where a user is in the tour, kept in the browser session while the page objects are rebuilt"""
+    current_step: int = 0
+    visited_steps: Set[int] = field(default_factory=lambda: {0})
 
 class DesignThinkingApp1:
-    def __init__(self):
-        self.current_step = 0
+    # Content search index, built once and shared by every session
+    search_index = None
+
+    def __init__(self, client_side_navigation=False, state: Optional[OnboardingState] = None):
+        # When enabled, all stages are sent to the browser once and switched there
+        self.client_side_navigation = client_side_navigation
+        self.state = state or OnboardingState()
+        # Rendered stage containers by index; only the current one is visible
+        self.stage_containers = {}
+        self.sidebar_cards = []
+        self.sidebar_titles = []
+        self.sidebar_checks = []
+        self.navigation_element_counts = []
         self.design_steps = [
             {
                 'name': 'Empathize',
@@ -351,10 +375,12 @@ class DesignThinkingApp1:
             self.current_step += 1
             self.update_content()
     
+    @timed
     def update_content(self):
-        # Clear and rebuild the main content area
-        self.main_content.clear()
-        self.build_main_content()
+        elements_before = self.main_content.client.next_element_id
+
+        # Swap to the pre-rendered stage (built here only if it was not prefetched)
+        self.show_stage(self.current_step)
         
         # Update navigation buttons state
         self.prev_button.set_enabled(self.current_step > 0)
@@ -366,8 +392,20 @@ class DesignThinkingApp1:
         # Update current stage indicator in top bar
         self.current_stage_text.set_text(f"{self.current_step + 1} of {len(self.design_steps)}")
         
-        # Rebuild the sidebar to update colors
-        self.sidebar.clear()
+        # Restyle the existing sidebar cards instead of rebuilding them
+        self.update_sidebar()
+
+        # Track how many elements each navigation creates (regression metric)
+        self.navigation_element_counts.append(self.main_content.client.next_element_id - elements_before)
+
+        # Pre-render the new neighbours off the critical path
+        spawn(self.prefetch_adjacent_stages(), key='prefetch onboarding stages')
+
+    def build_sidebar(self):
+        self.sidebar_cards = []
+        self.sidebar_titles = []
+        self.sidebar_checks = []
+
         with self.sidebar:
             # Sidebar header
             with ui.card().classes('w-full border-b border-grey-3 rounded-none p-4'):
@@ -377,79 +415,271 @@ class DesignThinkingApp1:
             # Scrollable steps list
             with ui.scroll_area().classes('flex-1 p-4'):
                 for index, step in enumerate(self.design_steps):
-                    is_active = index == self.current_step
                     card_classes = 'w-full mb-3 p-4 cursor-pointer transition-all duration-200'
-                    if is_active:
-                        card_classes += ' bg-blue-500 text-white'
+                    card = ui.card().classes(card_classes)
+                    if self.client_side_navigation:
+                        card.on('click', js_handler=f'() => window.onboardingNav.show({index})')
                     else:
-                        card_classes += ' bg-white hover:bg-grey-2'
-                    
-                    with ui.card().classes(card_classes).on('click', lambda i=index: self.navigate_to_step(i)):
+                        card.on('click', lambda i=index: self.navigate_to_step(i))
+                    with card:
                         with ui.row().classes('items-center'):
                             ui.icon(step['icon']).classes(f'text-2xl text-white bg-{step["color"]} rounded-full p-2 mr-3')
                             with ui.column().classes('flex-1'):
-                                title_classes = 'font-semibold'
-                                if is_active:
-                                    title_classes += ' text-white'
-                                else:
-                                    title_classes += ' text-grey-7'
-                                ui.label(f'{index + 1}. {step["name"]}').classes(title_classes)
+                                title = ui.label(f'{index + 1}. {step["name"]}').classes('font-semibold')
                                 ui.label(step['description']).classes('text-sm text-grey-5')
-                            if is_active:
-                                ui.icon('check_circle').classes('text-white')
+                            check = ui.icon('check_circle').classes('text-white')
+                    self.sidebar_cards.append(card)
+                    self.sidebar_titles.append(title)
+                    self.sidebar_checks.append(check)
+
+        self.update_sidebar()
+
+    def update_sidebar(self):
+        """Toggle the active/inactive classes on the persistent sidebar cards"""
+        for index, card in enumerate(self.sidebar_cards):
+            if index == self.current_step:
+                card.classes('bg-blue-500 text-white', remove='bg-white hover:bg-grey-2')
+                self.sidebar_titles[index].classes('text-white', remove='text-grey-7')
+            else:
+                card.classes('bg-white hover:bg-grey-2', remove='bg-blue-500 text-white')
+                self.sidebar_titles[index].classes('text-grey-7', remove='text-white')
+            self.sidebar_checks[index].set_visibility(index == self.current_step)
+
+    def get_search_index(self):
+        """Build the content search index on first use"""
+        if DesignThinkingApp1.search_index is None:
+            index = SearchIndex()
+            for stage, step in enumerate(self.design_steps):
+                content = step['content']
+                index.add(stage, 'Overview', content['overview'])
+                for activity in content['key_activities']:
+                    index.add(stage, 'Key Activities', activity)
+                for method in content['methods']:
+                    index.add(stage, 'Methods & Tools', f"{method['name']}: {method['description']}")
+                for tip in content['tips']:
+                    index.add(stage, 'Pro Tips', tip)
+                for deliverable in content['deliverables']:
+                    index.add(stage, 'Key Deliverables', deliverable)
+            DesignThinkingApp1.search_index = index.build()
+        return DesignThinkingApp1.search_index
+
+    def handle_search(self, e):
+        """Show matching stages and sections for the (debounced) search text"""
+        hits = self.get_search_index().search(e.args or '')
+        self.search_results.clear()
+        self.search_results.set_visibility(bool(hits))
+        with self.search_results:
+            for hit in hits:
+                step = self.design_steps[hit.stage]
+                with ui.column().classes('w-full p-2 cursor-pointer hover:bg-grey-2') as result:
+                    ui.label(f'{hit.stage + 1}. {step["name"]} · {hit.section}').classes('text-xs text-grey-6')
+                    ui.label(hit.text).classes('text-sm text-grey-9')
+                result.on('click', lambda i=hit.stage: self.open_search_result(i))
+
+    def open_search_result(self, step_index):
+        self.search_results.set_visibility(False)
+        if self.client_side_navigation:
+            ui.run_javascript(f'window.onboardingNav.show({step_index})')
+        else:
+            self.navigate_to_step(step_index)
 
     def build_main_content(self):
-        current_step_data = self.design_steps[self.current_step]
-        
+        self.build_stage_container(self.current_step)
+
+    def build_stage_container(self, step_index):
+        """Build one stage in its own container inside the main content area"""
         with self.main_content:
-            # Stage Header
-            with ui.card().classes('w-full mb-8 p-6'):
-                with ui.row().classes('items-center'):
-                    ui.icon(current_step_data['icon']).classes(f'text-6xl text-{current_step_data["color"]} mr-6')
-                    with ui.column():
-                        ui.label(current_step_data['name']).classes('text-3xl font-bold text-grey-9 mb-2')
-                        ui.label(current_step_data['description']).classes('text-xl text-grey-6')
-            
-            # Overview Section
-            with ui.card().classes('w-full mb-8'):
-                ui.label('Overview').classes('text-2xl font-semibold text-grey-9 mb-4')
-                ui.label(current_step_data['content']['overview']).classes('text-grey-7 leading-relaxed')
-            
-            # Key Activities Section
-            with ui.card().classes('w-full mb-8'):
-                ui.label('Key Activities').classes('text-2xl font-semibold text-grey-9 mb-4')
-                for activity in current_step_data['content']['key_activities']:
-                    with ui.row().classes('items-start mb-3'):
-                        ui.icon('circle').classes(f'text-{current_step_data["color"]} text-xs mt-2 mr-3')
-                        ui.label(activity).classes('text-grey-7')
-            
-            # Methods & Tools Section
-            with ui.card().classes('w-full mb-8'):
-                ui.label('Methods & Tools').classes('text-2xl font-semibold text-grey-9 mb-4')
-                with ui.grid(columns=2).classes('gap-4'):
-                    for method in current_step_data['content']['methods']:
-                        with ui.card().classes('p-4'):
-                            ui.label(method['name']).classes('font-semibold text-grey-9 mb-2')
-                            ui.label(method['description']).classes('text-grey-6 text-sm')
-            
-            # Pro Tips Section
-            with ui.card().classes('w-full mb-8 bg-yellow-1 border-yellow-3'):
-                ui.label('Pro Tips').classes('text-2xl font-semibold text-grey-9 mb-4')
-                for tip in current_step_data['content']['tips']:
-                    with ui.row().classes('items-start mb-3'):
-                        ui.icon('lightbulb').classes('text-yellow-6 text-sm mt-1 mr-3')
-                        ui.label(tip).classes('text-grey-7')
-            
-            # Deliverables Section
-            with ui.card().classes('w-full mb-8'):
-                ui.label('Key Deliverables').classes('text-2xl font-semibold text-grey-9 mb-4')
-                for deliverable in current_step_data['content']['deliverables']:
-                    with ui.row().classes('items-start mb-3'):
-                        ui.icon('check_circle').classes('text-green-6 text-sm mt-1 mr-3')
-                        ui.label(deliverable).classes('text-grey-7')
+            with ui.column().classes('w-full') as container:
+                self.build_stage(step_index)
+        container.set_visibility(step_index == self.current_step)
+        self.stage_containers[step_index] = container
+        return container
+
+    def build_all_stages(self):
+        """Build every stage once as hidden containers for client-side navigation"""
+        for index in range(len(self.design_steps)):
+            self.build_stage_container(index)
+
+    def show_stage(self, step_index):
+        """Make the given stage the only visible one"""
+        self.stage_containers = {index: container for index, container in self.stage_containers.items()
+                                 if not container.is_deleted}
+        if step_index not in self.stage_containers:
+            self.build_stage_container(step_index)
+        for index, container in self.stage_containers.items():
+            container.set_visibility(index == step_index)
+
+    async def prefetch_adjacent_stages(self):
+        """Pre-render the previous and next stages as hidden containers during idle time"""
+        await asyncio.sleep(0)  # let the visibility swap go out first
+        if self.main_content.is_deleted:  # navigated away in the meantime
+            return
+        wanted = {i for i in (self.current_step - 1, self.current_step, self.current_step + 1)
+                  if 0 <= i < len(self.design_steps)}
+        for index, container in list(self.stage_containers.items()):
+            if container.is_deleted:
+                del self.stage_containers[index]
+            elif index not in wanted:
+                self.stage_containers.pop(index).delete()
+        for index in sorted(wanted - set(self.stage_containers)):
+            self.build_stage_container(index)
+            await asyncio.sleep(0)
+            if self.main_content.is_deleted:
+                return
+
+    def setup_client_navigation(self):
+        """Switch stages, counters and sidebar highlighting in the browser"""
+        config = {
+            'current': self.current_step,
+            'total': len(self.design_steps),
+            'stages': [self.stage_containers[i].id for i in range(len(self.design_steps))],
+            'cards': [card.id for card in self.sidebar_cards],
+            'titles': [title.id for title in self.sidebar_titles],
+            'checks': [check.id for check in self.sidebar_checks],
+            'counter': self.step_counter.id,
+            'stageText': self.current_stage_text.id,
+            'prev': self.prev_button.id,
+            'next': self.next_button.id,
+        }
+        ui.run_javascript(f'''
+            window.onboardingNav = {{
+                ...{json.dumps(config)},
+                visited: [],
+                timer: null,
+                show(index) {{
+                    if (index < 0 || index >= this.total || index === this.current) return;
+                    getHtmlElement(this.stages[this.current])?.classList.add('hidden');
+                    getHtmlElement(this.stages[index])?.classList.remove('hidden');
+                    this.cards.forEach((id, i) => {{
+                        const active = i === index;
+                        const card = getHtmlElement(id);
+                        const title = getHtmlElement(this.titles[i]);
+                        if (card) {{
+                            ['bg-blue-500', 'text-white'].forEach(c => card.classList.toggle(c, active));
+                            ['bg-white', 'hover:bg-grey-2'].forEach(c => card.classList.toggle(c, !active));
+                        }}
+                        title?.classList.toggle('text-white', active);
+                        title?.classList.toggle('text-grey-7', !active);
+                        getHtmlElement(this.checks[i])?.classList.toggle('hidden', !active);
+                    }});
+                    const counter = getHtmlElement(this.counter);
+                    if (counter) counter.textContent = `Stage ${{index + 1}} of ${{this.total}}`;
+                    const stageText = getHtmlElement(this.stageText);
+                    if (stageText) stageText.textContent = `${{index + 1}} of ${{this.total}}`;
+                    [[this.prev, index > 0], [this.next, index < this.total - 1]].forEach(([id, enabled]) => {{
+                        const button = getHtmlElement(id);
+                        if (!button) return;
+                        button.classList.toggle('disabled', !enabled);
+                        button.disabled = !enabled;
+                    }});
+                    this.current = index;
+                    this.report(index);
+                }},
+                step(delta) {{
+                    this.show(this.current + delta);
+                }},
+                report(index) {{
+                    // Batch stage changes into one event once the user settles
+                    this.visited.push(index);
+                    clearTimeout(this.timer);
+                    this.timer = setTimeout(() => this.flush(), 1000);
+                }},
+                flush() {{
+                    clearTimeout(this.timer);
+                    if (!this.visited.length) return;
+                    emitEvent('onboarding_stage', {{stage: this.current, visited: this.visited}});
+                    this.visited = [];
+                }},
+            }};
+            if (!window.onboardingFlushOnHide) {{
+                // once per browser page; every visit replaces onboardingNav, the listener stays
+                window.onboardingFlushOnHide = true;
+                window.addEventListener('pagehide', () => window.onboardingNav?.flush());
+            }}
+        ''')
+        on_once('onboarding_stage', self.handle_stage_event)
+
+    @property
+    def current_step(self) -> int:
+        return self.state.current_step
+
+    @current_step.setter
+    def current_step(self, step_index: int):
+        self.state.current_step = step_index
+
+    @property
+    def visited_steps(self) -> Set[int]:
+        return self.state.visited_steps
+
+    def handle_stage_event(self, e):
+        """Record the stage reported by the browser for analytics and progress"""
+        def is_stage(value):
+            return type(value) is int and 0 <= value < len(self.design_steps)
+
+        if not isinstance(e.args, dict) or not is_stage(e.args.get('stage')):
+            return
+        visited = e.args.get('visited')
+        self.current_step = e.args['stage']
+        if isinstance(visited, list):
+            self.visited_steps.update(index for index in visited if is_stage(index))
+
+    def build_stage(self, step_index):
+        """Build the content of one stage in the current container"""
+        current_step_data = self.design_steps[step_index]
+        
+        # Stage Header
+        with ui.card().classes('w-full mb-8 p-6'):
+            with ui.row().classes('items-center'):
+                ui.icon(current_step_data['icon']).classes(f'text-6xl text-{current_step_data["color"]} mr-6')
+                with ui.column():
+                    ui.label(current_step_data['name']).classes('text-3xl font-bold text-grey-9 mb-2')
+                    ui.label(current_step_data['description']).classes('text-xl text-grey-6')
+        
+        # Overview Section
+        with ui.card().classes('w-full mb-8'):
+            ui.label('Overview').classes('text-2xl font-semibold text-grey-9 mb-4')
+            ui.label(current_step_data['content']['overview']).classes('text-grey-7 leading-relaxed')
+        
+        # Key Activities Section
+        with ui.card().classes('w-full mb-8'):
+            ui.label('Key Activities').classes('text-2xl font-semibold text-grey-9 mb-4')
+            for activity in current_step_data['content']['key_activities']:
+                with ui.row().classes('items-start mb-3'):
+                    ui.icon('circle').classes(f'text-{current_step_data["color"]} text-xs mt-2 mr-3')
+                    ui.label(activity).classes('text-grey-7')
+        
+        # Methods & Tools Section
+        with ui.card().classes('w-full mb-8'):
+            ui.label('Methods & Tools').classes('text-2xl font-semibold text-grey-9 mb-4')
+            with ui.grid(columns=2).classes('gap-4'):
+                for method in current_step_data['content']['methods']:
+                    with ui.card().classes('p-4'):
+                        ui.label(method['name']).classes('font-semibold text-grey-9 mb-2')
+                        ui.label(method['description']).classes('text-grey-6 text-sm')
+        
+        # Pro Tips Section
+        with ui.card().classes('w-full mb-8 bg-yellow-1 border-yellow-3'):
+            ui.label('Pro Tips').classes('text-2xl font-semibold text-grey-9 mb-4')
+            for tip in current_step_data['content']['tips']:
+                with ui.row().classes('items-start mb-3'):
+                    ui.icon('lightbulb').classes('text-yellow-6 text-sm mt-1 mr-3')
+                    ui.label(tip).classes('text-grey-7')
+        
+        # Deliverables Section
+        with ui.card().classes('w-full mb-8'):
+            ui.label('Key Deliverables').classes('text-2xl font-semibold text-grey-9 mb-4')
+            for deliverable in current_step_data['content']['deliverables']:
+                with ui.row().classes('items-start mb-3'):
+                    ui.icon('check_circle').classes('text-green-6 text-sm mt-1 mr-3')
+                    ui.label(deliverable).classes('text-grey-7')
 
     def create_ui(self):
-        ui.add_head_html('''
+        # Elements of a previous visit were deleted with the page
+        self.stage_containers = {}
+        self.sidebar_cards = []
+        self.sidebar_titles = []
+        self.sidebar_checks = []
+        add_head_html_once('''
             <style>
             :root {
                 --nicegui-default-padding: 0rem;
@@ -468,6 +698,12 @@ class DesignThinkingApp1:
                         with ui.column():
                             ui.label('Design Thinking Hub').classes('text-xl font-bold text-white')
                             ui.label('Learn the innovation process step by step').classes('text-sm text-white')
+                    with ui.column().classes('relative w-96 mx-8'):
+                        # QInput's debounce holds the model update until typing pauses for 200 ms
+                        self.search_input = ui.input(placeholder='Search methods, tips, deliverables...').props('dense dark clearable debounce=200').classes('w-full')
+                        self.search_input.on('update:model-value', self.handle_search)
+                        self.search_results = ui.card().classes('absolute top-full w-full z-50 p-2')
+                        self.search_results.set_visibility(False)
                     with ui.column().classes('items-end'):
                         ui.label('Current Stage').classes('text-sm text-white')
                         self.current_stage_text = ui.label(f'{self.current_step + 1} of {len(self.design_steps)}').classes('text-lg font-semibold text-white')
@@ -487,13 +723,32 @@ class DesignThinkingApp1:
                     # Fixed navigation at bottom
                     with ui.card().classes('border-t border-grey-3 rounded-none w-full'):
                         with ui.row().classes('items-center justify-between p-6 max-w-4xl mx-auto w-full'):
-                            self.prev_button = ui.button('Previous Stage', on_click=self.previous_step).props('outline').classes('px-4 py-2')
+                            server_side = not self.client_side_navigation
+                            self.prev_button = ui.button('Previous Stage', on_click=self.previous_step if server_side else None).props('outline').classes('px-4 py-2')
                             self.step_counter = ui.label(f'Stage {self.current_step + 1} of {len(self.design_steps)}').classes('text-sm text-grey-5')
-                            self.next_button = ui.button('Next Stage', icon='arrow_forward', on_click=self.next_step).classes('px-4 py-2')
+                            self.next_button = ui.button('Next Stage', icon='arrow_forward', on_click=self.next_step if server_side else None).classes('px-4 py-2')
+                            if self.client_side_navigation:
+                                self.prev_button.on('click', js_handler='() => window.onboardingNav.step(-1)')
+                                self.next_button.on('click', js_handler='() => window.onboardingNav.step(1)')
         
-        # Initialize content
-        self.build_main_content()
-        self.update_content()
+        # Initial render (once)
+        self.build_sidebar()
+        if self.client_side_navigation:
+            self.build_all_stages()
+            self.setup_client_navigation()
+        else:
+            self.build_main_content()
+            spawn(self.prefetch_adjacent_stages(), key='prefetch onboarding stages')
+        if self.client_side_navigation:
+            # The browser controller toggles the class and the DOM attribute; the disable prop would make
+            # QBtn swallow every click for the rest of the session
+            if self.current_step == 0:
+                self.prev_button.classes('disabled')
+            if self.current_step == len(self.design_steps) - 1:
+                self.next_button.classes('disabled')
+        else:
+            self.prev_button.set_enabled(self.current_step > 0)
+            self.next_button.set_enabled(self.current_step < len(self.design_steps) - 1)
 
 # Create and run the app
 def main():
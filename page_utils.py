@@ -0,0 +1,27 @@
+from nicegui import ui, context
+from typing import Callable
+import weakref
+
+# Per-client bookkeeping; entries disappear together with their client
+_head_html = weakref.WeakKeyDictionary()
+_event_handlers = weakref.WeakKeyDictionary()
+
+
+def add_head_html_once(code: str):
+    """Add HTML to the page head unless the current client already has it.
+
+    Page builders run again on every in-app navigation, so plain ui.add_head_html
+    would keep appending the same <style> block to the document.
+    """
+    added = _head_html.setdefault(context.client, set())
+    if code not in added:
+        added.add(code)
+        ui.add_head_html(code)
+
+
+def on_once(event_type: str, handler: Callable):
+    """Subscribe to a global event unless the handler is already subscribed for the current client"""
+    registered = _event_handlers.setdefault(context.client, set())
+    if (event_type, handler) not in registered:
+        registered.add((event_type, handler))
+        ui.on(event_type, handler)
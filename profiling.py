@@ -0,0 +1,196 @@
+"""
+Opt-in profiling of individual handler calls.
+A call is captured when its session was flagged or it falls into the sampled fraction; captures are
+written as folded stacks (flamegraph.pl / speedscope) into a bounded on-disk ring.
+"""
+
+import functools
+import inspect
+import random
+import re
+import sys
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse
+from nicegui import app, context, ui
+
+from metrics import LOCAL_HOSTS
+
+CAPTURE_NAME = re.compile(r'^(?P<time>\d{8}-\d{6})-(?P<seq>\d+)-(?P<label>.+)-(?P<ms>\d+)ms\.folded$')
+
+
+class StackCollector:
+    """sys.setprofile callback accumulating self time per call stack"""
+
+    def __init__(self):
+        self.stack = []  # [name, start, child time]
+        self.folded: Dict[str, float] = {}
+
+    def __call__(self, frame, event, arg):
+        now = time.perf_counter()
+        if event == 'call':
+            code = frame.f_code
+            self.stack.append([f'{code.co_qualname if hasattr(code, "co_qualname") else code.co_name} '
+                               f'({Path(code.co_filename).name}:{code.co_firstlineno})', now, 0.0])
+        elif event == 'c_call':
+            self.stack.append([getattr(arg, '__qualname__', repr(arg)), now, 0.0])
+        elif event in ('return', 'c_return', 'c_exception') and self.stack:
+            self.pop(now)
+
+    def pop(self, now: float):
+        key = ';'.join(entry[0] for entry in self.stack)
+        name, start, child = self.stack.pop()
+        elapsed = now - start
+        self.folded[key] = self.folded.get(key, 0.0) + elapsed - child
+        if self.stack:
+            self.stack[-1][2] += elapsed
+
+    def finish(self) -> str:
+        now = time.perf_counter()
+        while self.stack:  # frames still suspended (async) when the capture ended
+            self.pop(now)
+        return ''.join(f'{stack} {round(seconds * 1e6)}\n' for stack, seconds in self.folded.items() if seconds > 0)
+
+
+class Profiler:
+    def __init__(self, directory: str = 'profiles', max_captures: int = 50, max_bytes: int = 200 * 1024 * 1024,
+                 sample_rate: float = 0.0):
+        self.directory = Path(directory)
+        self.max_captures = max_captures
+        self.max_bytes = max_bytes
+        self.sample_rate = sample_rate
+        self.enabled = False
+        self.active = False
+        self.sequence = 0
+        self.flagged = weakref.WeakSet()
+
+    def flag(self, client=None):
+        """Profile every candidate call of a session"""
+        self.flagged.add(client or context.client)
+
+    def should_capture(self) -> bool:
+        if self.active:  # sys.setprofile is global; one capture at a time
+            return False
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        try:
+            return context.client in self.flagged
+        except RuntimeError:
+            return False
+
+    @contextmanager
+    def capture(self, label: str):
+        collector = StackCollector()
+        self.active = True
+        start = time.perf_counter()
+        sys.setprofile(collector)
+        try:
+            yield
+        finally:
+            sys.setprofile(None)
+            self.active = False
+            self.write(label, time.perf_counter() - start, collector.finish())
+
+    def profiled(self, name=None):
+        """Decorator capturing a profile of flagged or sampled calls; usable as @profiled or @profiled('name')"""
+        if callable(name):
+            return self.profiled()(name)
+
+        def decorator(func):
+            label = name or func.__qualname__
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if not (self.enabled and self.should_capture()):
+                        return await func(*args, **kwargs)
+                    with self.capture(label):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not (self.enabled and self.should_capture()):
+                    return func(*args, **kwargs)
+                with self.capture(label):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def write(self, label: str, seconds: float, folded: str):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sequence += 1
+        safe_label = re.sub(r'[^\w.]+', '_', label)
+        name = f'{datetime.now():%Y%m%d-%H%M%S}-{self.sequence}-{safe_label}-{round(seconds * 1000)}ms.folded'
+        (self.directory / name).write_text(folded)
+        total = 0
+        for index, path in enumerate(self.files()):  # newest first; drop whatever exceeds the ring
+            total += path.stat().st_size
+            if index >= self.max_captures or (index > 0 and total > self.max_bytes):
+                path.unlink(missing_ok=True)
+
+    def files(self) -> List[Path]:
+        """Capture files, newest first"""
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob('*.folded'), key=lambda path: path.stat().st_mtime, reverse=True)
+
+    def captures(self) -> List[dict]:
+        rows = []
+        for path in self.files():
+            match = CAPTURE_NAME.match(path.name)
+            if match:
+                rows.append({
+                    'name': path.name,
+                    'time': datetime.strptime(match['time'], '%Y%m%d-%H%M%S').strftime('%Y-%m-%d %H:%M:%S'),
+                    'handler': match['label'],
+                    'duration_ms': int(match['ms']),
+                    'size_kb': round(path.stat().st_size / 1024, 1),
+                })
+        return rows
+
+    def install(self, path: str = '/admin/profiles'):
+        """Enable captures and add an admin page listing them (local requests only)"""
+        self.enabled = True
+
+        def check_local(request: Request):
+            if not (request.client and request.client.host in LOCAL_HOSTS):
+                raise HTTPException(status_code=403)
+
+        @app.get(path + '/{name}', include_in_schema=False)
+        def download(name: str, request: Request):
+            check_local(request)
+            file = self.directory / Path(name).name
+            if not CAPTURE_NAME.match(file.name) or not file.exists():
+                raise HTTPException(status_code=404)
+            return FileResponse(file, media_type='text/plain', filename=file.name)
+
+        @ui.page(path)
+        def admin(request: Request):
+            check_local(request)
+            ui.page_title('Profiles')
+            ui.label('Profile captures').classes('text-2xl font-bold')
+            ui.label(f'Sample rate {self.sample_rate:.1%}, keeping the last {self.max_captures} captures '
+                     f'(at most {self.max_bytes // 2**20} MB) in {self.directory}. '
+                     'Open a page with ?profile=1 to profile every call of that session. Files are folded stacks for flamegraph.pl or speedscope.').classes('text-sm text-gray-600')
+            columns = [
+                {'name': 'time', 'label': 'Time', 'field': 'time', 'sortable': True},
+                {'name': 'handler', 'label': 'Handler', 'field': 'handler', 'sortable': True},
+                {'name': 'duration_ms', 'label': 'Duration (ms)', 'field': 'duration_ms', 'sortable': True},
+                {'name': 'size_kb', 'label': 'Size (kB)', 'field': 'size_kb'},
+                {'name': 'name', 'label': 'File', 'field': 'name'},
+            ]
+            table = ui.table(columns=columns, rows=self.captures(), row_key='name').classes('w-full')
+            table.add_slot('body-cell-name', f'''
+                <q-td :props="props"><a :href="'{path}/' + props.value" class="text-blue-600">{{{{ props.value }}}}</a></q-td>
+            ''')
+        return self
+
+
+profiler = Profiler()
+profiled = profiler.profiled
@@ -0,0 +1,49 @@
+"""
+Content-aware progress of the design thinking steps.
+Each step's questions are embedded once per process, together with the words that answers to them
+tend to use (DesignStep.signals), so "They feel anxious" counts towards "What emotions are involved?".
+Every user message is compared with the questions of its step in one matrix-vector product and
+adds diminishing credit to each question it addresses, so scoring a message costs the same however
+long the conversation already is.
+"""
+
+from functools import lru_cache
+from itertools import zip_longest
+from typing import List, Tuple
+
+import numpy as np
+
+from vectors import embed, embed_many
+
+NOISE = 0.05  # similarity that unrelated texts reach through shared trigrams
+FULL_CREDIT = 0.25  # similarity at which a message fully answers a question
+COMPLETE = 0.95  # mean coverage shown as 100%
+
+
+@lru_cache(maxsize=None)
+def question_matrix(questions: Tuple[str, ...], signals: Tuple[str, ...]) -> np.ndarray:
+    """Vectors of a step's questions with their answer vocabulary, one row each; computed once per process"""
+    return embed_many([f'{question} {words}' for question, words in zip_longest(questions, signals, fillvalue='')])
+
+
+class ProgressScorer:
+    """Per-question coverage of every step, updated one message at a time"""
+
+    def __init__(self, steps):
+        self.matrices = [question_matrix(tuple(step.questions), tuple(step.signals)) for step in steps]
+        self.coverage = [np.zeros(len(matrix), dtype=np.float32) for matrix in self.matrices]
+
+    def add(self, step_index: int, text: str) -> int:
+        """Credit a user message to its step's questions and return the step's new progress"""
+        similarity = self.matrices[step_index] @ embed(text)
+        credit = np.clip((similarity - NOISE) / (FULL_CREDIT - NOISE), 0.0, 1.0)
+        coverage = self.coverage[step_index]
+        coverage += (1.0 - coverage) * credit
+        return self.progress(step_index)
+
+    def progress(self, step_index: int) -> int:
+        mean = float(self.coverage[step_index].mean())
+        return 100 if mean >= COMPLETE else int(round(mean * 100))
+
+    def covered(self, step_index: int) -> List[float]:
+        return self.coverage[step_index].tolist()
@@ -0,0 +1,189 @@
+"""
+Prompt templates and incremental conversation context for the design thinking agents.
+Each step's system prompt is compiled (rendered and tokenized) once per process; conversation
+messages are tokenized once when they are appended, and the context is assembled newest-first
+within a token budget. A SessionContext keeps running token totals over all steps of a session and
+fills the budget left after the recent turns with the most relevant earlier messages.
+"""
+
+import math
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+# Rough BPE-like estimate: words cost one token per ~4 characters, punctuation one token each
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+MESSAGE_OVERHEAD = 4  # role and separators per chat message
+TERM_PATTERN = re.compile(r'[a-z]{3,}')
+STOP_WORDS = frozenset('''
+    the and for are but not you your yours our ours they them their this that these those with from
+    have has had was were been being what which who whom how why when where can could should would
+    will shall may might must about into over just than then there here also very some any all each
+    more most such only own same too let lets get got its
+'''.split())
+
+SYSTEM_TEMPLATE = (
+    'You are the {agent} in a design thinking workshop, guiding the {name} step: {description}.\n'
+    'Questions worth exploring in this step:\n{questions}\n'
+    'Ask one focused question at a time and build on what the user already said.'
+)
+
+
+def count_tokens(text: str) -> int:
+    return sum(math.ceil(len(piece) / 4) for piece in TOKEN_PATTERN.findall(text))
+
+
+def count_messages(messages: List[Dict[str, str]]) -> int:
+    return sum(count_tokens(message['content']) + MESSAGE_OVERHEAD for message in messages)
+
+
+def terms(text: str) -> FrozenSet[str]:
+    """Content words of a message, used to score relevance"""
+    return frozenset(TERM_PATTERN.findall(text.lower())) - STOP_WORDS
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    agent: str
+    name: str
+    system_prompt: str
+    system_message: Dict[str, str]
+    system_tokens: int
+
+
+@lru_cache(maxsize=None)
+def compile_prompt(agent: str, name: str, description: str, questions: Tuple[str, ...]) -> CompiledPrompt:
+    """Render and tokenize a step's system prompt; cached for the lifetime of the process"""
+    system_prompt = SYSTEM_TEMPLATE.format(
+        agent=agent,
+        name=name,
+        description=description[0].lower() + description[1:],
+        questions='\n'.join(f'- {question}' for question in questions),
+    )
+    return CompiledPrompt(agent, name, system_prompt, {'role': 'system', 'content': system_prompt},
+                          count_tokens(system_prompt) + MESSAGE_OVERHEAD)
+
+
+def compile_step(step) -> CompiledPrompt:
+    return compile_prompt(step.agent, step.name, step.description, tuple(step.questions))
+
+
+class ConversationContext:
+    """Chat history of one step, tokenized incrementally and assembled within a token budget"""
+
+    def __init__(self, prompt: CompiledPrompt, budget: int = 3000):
+        self.prompt = prompt
+        self.budget = budget
+        self.entries: List[Tuple[Dict[str, str], int, FrozenSet[str]]] = []  # (chat message, tokens, terms)
+        self.total_tokens = 0
+        self._assembled: Optional[List[Dict[str, str]]] = None
+
+    def append(self, role: str, content: str) -> int:
+        """Add a message, tokenizing only this message; returns its token count"""
+        tokens = count_tokens(content) + MESSAGE_OVERHEAD
+        self.entries.append(({'role': role, 'content': content}, tokens, terms(content)))
+        self.total_tokens += tokens
+        self._assembled = None
+        return tokens
+
+    def assemble(self, budget: Optional[int] = None) -> List[Dict[str, str]]:
+        """System message plus the newest messages that fit into the budget, oldest first"""
+        if budget is None and self._assembled is not None:
+            return self._assembled
+        remaining = (budget or self.budget) - self.prompt.system_tokens
+        selected = []
+        for message, tokens, _ in reversed(self.entries):
+            if tokens > remaining:
+                break
+            selected.append(message)
+            remaining -= tokens
+        assembled = [self.prompt.system_message, *reversed(selected)]
+        if budget is None:
+            self._assembled = assembled
+        return assembled
+
+
+class SessionContext:
+    """Conversation contexts of all steps of one session with running token counts.
+
+    assemble() keeps the newest turns of the current step and fills the rest of the budget with
+    the earlier messages (of any step) that share the most terms with the latest user message.
+    Candidates come from a term index, at most `max_candidates` per query term, so the cost of a
+    call does not grow with the length of the session.
+    """
+
+    def __init__(self, budget: int = 3000, recent: int = 6, max_candidates: int = 50):
+        self.budget = budget
+        self.recent = recent
+        self.max_candidates = max_candidates
+        self.steps: Dict[int, ConversationContext] = {}
+        self.index: Dict[str, List[Tuple[int, int]]] = defaultdict(list)  # term -> (step, position)
+        self.total_tokens = 0
+        self._assembled: Dict[int, List[Dict[str, str]]] = {}
+
+    def step(self, index: int, prompt: CompiledPrompt) -> ConversationContext:
+        context = self.steps.get(index)
+        if context is None:
+            context = self.steps[index] = ConversationContext(prompt, self.budget)
+        return context
+
+    def append(self, index: int, role: str, content: str) -> int:
+        context = self.steps[index]
+        tokens = context.append(role, content)
+        for term in context.entries[-1][2]:
+            self.index[term].append((index, len(context.entries) - 1))
+        self.total_tokens += tokens
+        self._assembled.clear()
+        return tokens
+
+    def assemble(self, index: int, budget: Optional[int] = None) -> List[Dict[str, str]]:
+        """System message of step `index`, messages recalled from other steps, then this step's messages.
+
+        Each group keeps conversation order, so the latest turn of the current step always comes last.
+        """
+        if budget is None and index in self._assembled:
+            return self._assembled[index]
+        context = self.steps[index]
+        remaining = (budget or self.budget) - context.prompt.system_tokens
+        chosen = set()
+        # the newest turns of this step always come first, as far as they fit
+        for position in range(len(context.entries) - 1, max(len(context.entries) - self.recent, 0) - 1, -1):
+            tokens = context.entries[position][1]
+            if tokens > remaining:
+                break
+            chosen.add((index, position))
+            remaining -= tokens
+        query = next((entry[2] for entry in reversed(context.entries) if entry[0]['role'] == 'user'), frozenset())
+        candidates = []
+        if query and remaining > 0:
+            keys = set()
+            for term in query:
+                keys.update(self.index.get(term, ())[-self.max_candidates:])
+            for step_index, position in keys - chosen:
+                step = self.steps[step_index]
+                _, tokens, message_terms = step.entries[position]
+                if step_index != index:
+                    tokens += count_tokens(f'[{step.prompt.name}]')
+                if tokens > remaining:
+                    continue
+                # favour this step, and later messages on ties
+                score = len(query & message_terms) / math.sqrt(len(message_terms))
+                if step_index == index:
+                    score += 0.5
+                candidates.append((score, step_index, position, tokens))
+        for _, step_index, position, tokens in sorted(candidates, key=lambda c: (-c[0], -c[1], -c[2])):
+            if tokens <= remaining:
+                chosen.add((step_index, position))
+                remaining -= tokens
+        assembled = [context.prompt.system_message]
+        for step_index, position in sorted(chosen, key=lambda key: (key[0] == index, key)):
+            step = self.steps[step_index]
+            message = step.entries[position][0]
+            if step_index != index:
+                message = {'role': message['role'], 'content': f'[{step.prompt.name}] {message["content"]}'}
+            assembled.append(message)
+        if budget is None:
+            self._assembled[index] = assembled
+        return assembled
@@ -0,0 +1,136 @@
+"""
+Element and websocket payload accounting per handler invocation and per page.
+Handlers wrapped with metrics.timed report elements created/deleted; socket bytes are attributed
+to the handler that last ran on the sending client (the outbox flushes right after it).
+"""
+
+import weakref
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from nicegui import context, json, ui
+from nicegui.client import Client
+from nicegui.outbox import Outbox
+
+from metrics import metrics
+
+
+@dataclass
+class RenderCounts:
+    calls: int = 0
+    created: int = 0
+    deleted: int = 0
+    bytes: int = 0
+    messages: int = 0
+
+
+class RenderStats:
+    def __init__(self):
+        self.enabled = False
+        self.handlers: Dict[str, RenderCounts] = {}
+        self.pages: Dict[str, RenderCounts] = {}
+        # Per-client attribution state; entries disappear together with their client
+        self.active_handler = weakref.WeakKeyDictionary()
+        self.page_names = weakref.WeakKeyDictionary()
+        self.clients = weakref.WeakKeyDictionary()
+        self.last_invocation = weakref.WeakKeyDictionary()
+        self.depth = weakref.WeakKeyDictionary()
+
+    def install(self):
+        """Count outgoing socket messages and hook into @timed handlers"""
+        if self.enabled:
+            return self
+        self.enabled = True
+        original_emit = Outbox._emit
+        stats = self
+
+        async def _emit(outbox: Outbox, message) -> None:
+            stats.record_message(outbox.client, message[1], message[2])
+            await original_emit(outbox, message)
+
+        Outbox._emit = _emit
+        metrics.add_probe(self)
+        metrics.add_collector(self.collect)
+        return self
+
+    def set_page(self, name: str):
+        """Attribute the current client's following work to a named page instead of its route"""
+        if self.enabled:
+            self.page_names[context.client] = name
+
+    def page_for(self, client: Client) -> str:
+        return self.page_names.get(client) or client.page.path
+
+    def counts_for(self, client: Client) -> RenderCounts:
+        counts = self.clients.get(client)
+        if counts is None:
+            counts = self.clients[client] = RenderCounts()
+        return counts
+
+    def begin(self, label: str) -> Optional[Tuple[Client, int, int]]:
+        try:
+            client = context.client
+        except RuntimeError:  # handler running outside of any UI context
+            return None
+        self.depth[client] = self.depth.get(client, 0) + 1
+        return client, client.next_element_id, len(client.elements)
+
+    def end(self, label: str, token: Optional[Tuple[Client, int, int]]):
+        if token is None:
+            return
+        client, next_id, live = token
+        created = client.next_element_id - next_id
+        deleted = created - (len(client.elements) - live)
+        self.depth[client] -= 1
+        handler = self.handlers.setdefault(label, RenderCounts())
+        handler.calls += 1
+        handler.created += created
+        handler.deleted += deleted
+        if self.depth[client]:
+            return  # nested handler; page and client totals are taken from the outermost one
+        self.active_handler[client] = label
+        for counts in (self.pages.setdefault(self.page_for(client), RenderCounts()), self.counts_for(client)):
+            counts.calls += 1
+            counts.created += created
+            counts.deleted += deleted
+        self.last_invocation[client] = {'handler': label, 'created': created, 'deleted': deleted}
+
+    def record_message(self, client: Client, message_type: str, data) -> None:
+        size = len(json.dumps([message_type, data]))
+        label = self.active_handler.get(client, 'page load')
+        for counts in (self.handlers.setdefault(label, RenderCounts()),
+                       self.pages.setdefault(self.page_for(client), RenderCounts()),
+                       self.counts_for(client)):
+            counts.bytes += size
+            counts.messages += 1
+
+    def collect(self):
+        for scope, table in (('handler', self.handlers), ('page', self.pages)):
+            for field, help_text in (('created', 'Elements created'), ('deleted', 'Elements deleted'),
+                                     ('bytes', 'Websocket payload bytes sent'), ('messages', 'Websocket messages sent')):
+                name = f'app_render_{field}_by_{scope}_total'
+                yield f'# HELP {name} {help_text} per {scope}'
+                yield f'# TYPE {name} counter'
+                for key, counts in sorted(table.items()):
+                    yield f'{name}{{{scope}="{key}"}} {getattr(counts, field)}'
+
+    def overlay(self):
+        """Small fixed panel with the current client's render and payload numbers"""
+        client = context.client
+        with ui.card().classes('fixed bottom-4 left-4 z-50 p-3 bg-black/80 text-white text-xs font-mono gap-0'):
+            lines = [ui.label() for _ in range(4)]
+
+        def refresh():
+            counts = self.counts_for(client)
+            last = self.last_invocation.get(client)
+            self.active_handler[client] = 'debug overlay'  # keep the overlay's own updates out of handler numbers
+            lines[0].text = f'page {self.page_for(client)}: {len(client.elements)} live elements'
+            lines[1].text = (f'last {last["handler"]}: +{last["created"]} / -{last["deleted"]} elements'
+                             if last else 'last handler: -')
+            lines[2].text = f'created {counts.created}, deleted {counts.deleted}'
+            lines[3].text = f'sent {counts.bytes / 1024:.1f} kB in {counts.messages} messages'
+        refresh()
+        ui.timer(1.0, refresh)
+
+
+render_stats = RenderStats()
@@ -0,0 +1,103 @@
+"""
+In-memory search index with prefix and fuzzy matching.
+Built once from static content and shared by every session.
+"""
+
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, List, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    stage: int
+    section: str
+    text: str
+    score: float
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def deletes(term: str) -> Set[str]:
+    """All variants of a term with one character removed (for edit-distance-1 lookups)"""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+class SearchIndex:
+    def __init__(self, max_results: int = 8):
+        self.max_results = max_results
+        self.documents: List[Tuple[int, str, str]] = []
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+        self.terms: List[str] = []
+        self.fuzzy_terms: Dict[str, Set[str]] = defaultdict(set)
+        self.search = lru_cache(maxsize=1024)(self._search)
+
+    def add(self, stage: int, section: str, text: str):
+        """Add one searchable passage"""
+        doc_id = len(self.documents)
+        self.documents.append((stage, section, text))
+        for term in tokenize(text):
+            self.postings[term].add(doc_id)
+
+    def build(self):
+        """Freeze the vocabulary; call once after all passages are added"""
+        self.terms = sorted(self.postings)
+        self.fuzzy_terms.clear()
+        for term in self.terms:
+            self.fuzzy_terms[term].add(term)
+            for variant in deletes(term):
+                self.fuzzy_terms[variant].add(term)
+        self.search.cache_clear()
+        return self
+
+    def match_term(self, token: str, prefix: bool) -> Dict[int, float]:
+        """Score documents for one query token: exact 3, prefix 2, fuzzy 1"""
+        scores: Dict[int, float] = {}
+
+        def credit(term: str, score: float):
+            for doc_id in self.postings[term]:
+                scores[doc_id] = max(scores.get(doc_id, 0), score)
+
+        if prefix:
+            start = bisect_left(self.terms, token)
+            for term in islice(self.terms, start, None):
+                if not term.startswith(token):
+                    break
+                credit(term, 3 if term == token else 2)
+        elif token in self.postings:
+            credit(token, 3)
+
+        if len(token) >= 3:
+            candidates = set(self.fuzzy_terms.get(token, ()))
+            for variant in deletes(token):
+                candidates |= self.fuzzy_terms.get(variant, set())
+            for term in candidates:
+                credit(term, 1)
+        return scores
+
+    def _search(self, query: str) -> Tuple[SearchHit, ...]:
+        tokens = tokenize(query)
+        if not tokens:
+            return ()
+
+        # Every token must match; the last one is treated as a prefix while typing
+        totals: Dict[int, float] = {}
+        for position, token in enumerate(tokens):
+            scores = self.match_term(token, prefix=position == len(tokens) - 1)
+            if position == 0:
+                totals = scores
+            else:
+                totals = {doc_id: totals[doc_id] + score for doc_id, score in scores.items() if doc_id in totals}
+            if not totals:
+                return ()
+
+        ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))[:self.max_results]
+        return tuple(SearchHit(*self.documents[doc_id], score) for doc_id, score in ranked)
@@ -0,0 +1,152 @@
+"""
+Per-session state with a reconnect grace period.
+State is kept warm while a browser is disconnected, then persisted and evicted by a reaper.
+"""
+
+import asyncio
+import gc
+import sys
+import time
+import types
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Set
+
+from nicegui import app, background_tasks
+from nicegui.client import Client
+from nicegui.element import Element
+
+
+@dataclass
+class Session:
+    token: str
+    state: Dict[str, Any] = field(default_factory=dict)
+    client_ids: Set[str] = field(default_factory=set)
+    disconnected_at: Optional[float] = None
+
+
+def deep_sizeof(obj: Any) -> int:
+    """Approximate memory held by an object graph, not following UI elements, clients, modules or code"""
+    stop_types = (Element, Client, type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType)
+    seen = set()
+    size = 0
+    pending = [obj]
+    while pending:
+        current = pending.pop()
+        if id(current) in seen or isinstance(current, stop_types):
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+        pending.extend(gc.get_referents(current))
+    return size
+
+
+class SessionManager:
+    def __init__(self, grace_period: float = 120.0, reap_interval: float = 10.0,
+                 persist: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        self.grace_period = grace_period
+        self.reap_interval = reap_interval
+        self.persist = persist
+        self.sessions: Dict[str, Session] = {}
+        self.client_tokens: Dict[str, str] = {}
+        self.reclaimed_bytes = 0
+        self.evicted_sessions = 0
+        self.resumed_connections = 0
+        self.restored_sessions = 0
+        self.connected_clients: Set[str] = set()
+        self.expire_handlers = []
+
+    def install(self):
+        """Hook into client lifecycle events and start the reaper"""
+        app.on_connect(self.handle_connect)
+        app.on_disconnect(self.handle_disconnect)
+        app.on_delete(self.handle_delete)
+        app.on_startup(lambda: background_tasks.create(self.reap_loop(), name='session reaper'))
+        app.get('/sessions/stats')(self.stats)
+        return self
+
+    def token_for(self, client: Client) -> str:
+        """Browser token if browser storage is enabled, otherwise the client id"""
+        try:
+            return app.storage.browser['id']
+        except (RuntimeError, KeyError):
+            return client.id
+
+    def get(self, client: Client, key: str, factory: Callable[[], Any]) -> Any:
+        """Return the session state object for `key`, creating it on first use"""
+        token = self.token_for(client)
+        session = self.sessions.get(token)
+        if session is None:
+            session = self.sessions[token] = Session(token)
+        elif client.id not in session.client_ids and key in session.state:
+            self.restored_sessions += 1  # new page load, but the user keeps their place
+        session.client_ids.add(client.id)
+        session.disconnected_at = None
+        self.client_tokens[client.id] = token
+        if key not in session.state:
+            session.state[key] = factory()
+        return session.state[key]
+
+    def session_for(self, client: Client) -> Optional[Session]:
+        token = self.client_tokens.get(client.id)
+        return self.sessions.get(token) if token else None
+
+    def on_expire(self, handler: Callable[[Session], Any]):
+        """Register a callback invoked right before a session is evicted"""
+        self.expire_handlers.append(handler)
+
+    def handle_connect(self, client: Client):
+        if client.id in self.connected_clients:
+            self.resumed_connections += 1  # same client came back; NiceGUI replays only missed messages
+        self.connected_clients.add(client.id)
+        session = self.session_for(client)
+        if session:
+            session.client_ids.add(client.id)
+            session.disconnected_at = None
+
+    def handle_disconnect(self, client: Client):
+        session = self.session_for(client)
+        if session:
+            session.client_ids.discard(client.id)
+            if not session.client_ids:
+                session.disconnected_at = time.time()
+
+    def handle_delete(self, client: Client):
+        self.handle_disconnect(client)
+        self.client_tokens.pop(client.id, None)
+        self.connected_clients.discard(client.id)
+
+    def reap(self, now: Optional[float] = None) -> int:
+        """Persist and evict sessions whose grace period has expired; return the number evicted"""
+        now = time.time() if now is None else now
+        expired = [session for session in self.sessions.values()
+                   if session.disconnected_at is not None and now - session.disconnected_at > self.grace_period]
+        for session in expired:
+            for handler in self.expire_handlers:
+                handler(session)
+            if self.persist:
+                self.persist(session.token, session.state)
+            self.reclaimed_bytes += deep_sizeof(session.state)
+            del self.sessions[session.token]
+            for client_id in [cid for cid, token in self.client_tokens.items() if token == session.token]:
+                del self.client_tokens[client_id]
+            self.evicted_sessions += 1
+        return len(expired)
+
+    async def reap_loop(self):
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            self.reap()
+
+    @property
+    def live_sessions(self) -> int:
+        return len(self.sessions)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'live_sessions': self.live_sessions,
+            'connected_sessions': sum(1 for session in self.sessions.values() if session.client_ids),
+            'evicted_sessions': self.evicted_sessions,
+            'reclaimed_bytes': self.reclaimed_bytes,
+            'resumed_connections': self.resumed_connections,
+            'restored_sessions': self.restored_sessions,
+        }
@@ -1,67 +1,153 @@
 from nicegui import ui, run
-from typing import Optional, Any
+from typing import Optional, Any, Dict, List
+from dataclasses import dataclass
+import json
+from page_utils import add_head_html_once, on_once
+from task_supervisor import spawn
+from metrics import timed
+from profiling import profiled
+
+DEFAULT_CARDS = [
+    {
+        'title': 'Card 1',
+        'subtitle': 'First Card',
+        'content': 'This is the content of the first card. It demonstrates smooth transitions and responsive design.',
+        'color': 'bg-blue-500',
+        'icon': '🚀'
+    },
+    {
+        'title': 'Card 2',
+        'subtitle': 'Second Card',
+        'content': 'This is the content of the second card. You can navigate using arrow keys or mouse clicks.',
+        'color': 'bg-green-500',
+        'icon': '🎯'
+    },
+    {
+        'title': 'Card 3',
+        'subtitle': 'Third Card',
+        'content': 'This is the content of the third card. The slider wraps around for continuous navigation.',
+        'color': 'bg-purple-500',
+        'icon': '⭐'
+    }
+]
+
+# Shown in the slots until the first pages arrive from the card source
+LOADING_CARD = {'title': '', 'subtitle': '', 'content': '', 'color': 'bg-gray-700', 'icon': ''}
+
+# Decks larger than this show a position counter instead of one dot per card
+MAX_INDICATORS = 10
+
+
+class CardSource:
+    """Supplies slider cards by position (subclass for databases, APIs, ...)"""
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def fetch(self, offset: int, limit: int) -> List[Dict[str, str]]:
+        raise NotImplementedError
+
+
+class ListCardSource(CardSource):
+    """Card source backed by an in-memory list"""
+
+    def __init__(self, cards: List[Dict[str, str]]):
+        self.cards = cards
+
+    def count(self) -> int:
+        return len(self.cards)
+
+    def fetch(self, offset: int, limit: int) -> List[Dict[str, str]]:
+        return self.cards[offset:offset + limit]
+
+
+@dataclass
+class SliderState:
+    """The card a user is on, kept in the browser session while the page objects are rebuilt"""
+    current_index: int = 0
+
 
 class CardSlider:
-    def __init__(self):
-        self.current_index = 0
-        self.cards = [
-            {
-                'title': 'Card 1',
-                'subtitle': 'First Card',
-                'content': 'This is the content of the first card. It demonstrates smooth transitions and responsive design.',
-                'color': 'bg-blue-500',
-                'icon': '🚀'
-            },
-            {
-                'title': 'Card 2',
-                'subtitle': 'Second Card',
-                'content': 'This is the content of the second card. You can navigate using arrow keys or mouse clicks.',
-                'color': 'bg-green-500',
-                'icon': '🎯'
-            },
-            {
-                'title': 'Card 3',
-                'subtitle': 'Third Card',
-                'content': 'This is the content of the third card. The slider wraps around for continuous navigation.',
-                'color': 'bg-purple-500',
-                'icon': '⭐'
-            }
-        ]
+    def __init__(self, source: Optional[CardSource] = None, page_size: int = 20,
+                 state: Optional[SliderState] = None):
+        self.state = state or SliderState()
+        self.source = source or ListCardSource(DEFAULT_CARDS)
+        self.page_size = page_size
         self.slider_container: Optional[Any] = None
+        self.slots = []
         self.indicators = []
+        self.counter = None
+
+    @property
+    def current_index(self) -> int:
+        return self.state.current_index
+
+    @current_index.setter
+    def current_index(self, index: int):
+        self.state.current_index = index
+
+    @property
+    def total(self) -> int:
+        return self.source.count()
 
     def next_card(self):
-        self.current_index = (self.current_index + 1) % len(self.cards)
+        if not self.total:
+            return
+        self.current_index = (self.current_index + 1) % self.total
         self.update_slider()
         
     def prev_card(self):
-        self.current_index = (self.current_index - 1) % len(self.cards)
+        if not self.total:
+            return
+        self.current_index = (self.current_index - 1) % self.total
         self.update_slider()
         
     def go_to_card(self, index):
-        self.current_index = index
+        if not self.total:
+            return
+        self.current_index = index % self.total
         self.update_slider()
         
     def update_slider(self):
+        """Move the browser-side slider to the current card"""
         if self.slider_container:
-            # Update transform to show current card
-            offset = -self.current_index * 33.333
-            self.slider_container.style(f'transform: translateX({offset}%)')
-            
-            # Update indicators
-            for i, indicator in enumerate(self.indicators):
-                if i == self.current_index:
-                    indicator.classes('bg-white', remove='bg-white/50')
-                else:
-                    indicator.classes('bg-white/50', remove='bg-white')
+            ui.run_javascript(f'window.cardSlider?.go({self.current_index}, false)')
+
+    @timed
+    @profiled
+    def handle_index_event(self, e):
+        """Record the settled card index reported by the browser"""
+        self.current_index = e.args
+
+    def fetch_page(self, page: int) -> List[Dict[str, str]]:
+        return self.source.fetch(page * self.page_size, self.page_size)
+
+    @timed
+    @profiled
+    async def handle_page_event(self, e):
+        """Send a page of cards requested by the browser"""
+        page = int(e.args)
+        cards = await run.io_bound(self.fetch_page, page)
+        ui.run_javascript(f'window.cardSlider?.addPage({page}, {json.dumps(cards)})')
+
+    def create_slot(self, card: Dict[str, str]):
+        """Create one recyclable card element; the browser refills it as the index moves"""
+        with ui.element('div').classes(f'{card["color"]} card-content') as root:
+            with ui.element('div').classes('text-center text-white p-8 max-w-2xl'):
+                icon = ui.label(card['icon']).classes('text-8xl mb-4')
+                title = ui.label(card['title']).classes('text-5xl font-bold mb-2')
+                subtitle = ui.label(card['subtitle']).classes('text-2xl mb-6 opacity-90')
+                content = ui.label(card['content']).classes('text-lg leading-relaxed')
+        root.props(f'data-color="{card["color"]}"')
+        self.slots.append({'root': root, 'icon': icon, 'title': title, 'subtitle': subtitle, 'content': content})
 
     def create_ui(self):
         """Create the slider UI"""
         # Set up the page
-        ui.page_title('3-Card Slider')
+        ui.page_title('Card Slider')
 
         # Add custom CSS
-        ui.add_head_html('''
+        add_head_html_once('''
         <style>
             body {
                 margin: 0;
@@ -108,67 +194,219 @@ class CardSlider:
         ''')
 
         # Main container
+        self.slots = []
+        self.indicators = []
+        self.counter = None
+        total = self.total
+        if not total:
+            self.slider_container = None
+            with ui.element('div').classes('w-full h-screen flex items-center justify-center bg-gray-700'):
+                ui.label('No cards to show').classes('text-white text-2xl')
+            return
+        self.current_index %= total
+
         with ui.element('div').classes('relative w-full h-screen overflow-hidden'):
-            # Slider container
+            # Slider track with three recycled slots: previous, current and next card
             with ui.element('div').classes('slider-container') as slider_container:
                 self.slider_container = slider_container
-                
-                # Create cards
-                for i, card in enumerate(self.cards):
-                    with ui.element('div').classes(f'{card["color"]} card-content'):
-                        with ui.element('div').classes('text-center text-white p-8 max-w-2xl'):
-                            ui.label(card['icon']).classes('text-8xl mb-4')
-                            ui.label(card['title']).classes('text-5xl font-bold mb-2')
-                            ui.label(card['subtitle']).classes('text-2xl mb-6 opacity-90')
-                            ui.label(card['content']).classes('text-lg leading-relaxed')
+                for _ in range(3):
+                    self.create_slot(LOADING_CARD)
+            self.slider_container.style('transform: translateX(-33.333%)')
             
             # Navigation buttons
             with ui.element('div').classes('absolute inset-0 flex items-center justify-between px-4 pointer-events-none'):
                 # Left arrow
                 left_button = ui.button('❮').classes('nav-button text-white text-2xl p-4 bg-black/30 rounded-full hover:bg-black/50 pointer-events-auto')
-                left_button.on('click', lambda: self.prev_card())
+                left_button.on('click', js_handler='() => window.cardSlider.step(-1)')
                     
                 # Right arrow  
                 right_button = ui.button('❯').classes('nav-button text-white text-2xl p-4 bg-black/30 rounded-full hover:bg-black/50 pointer-events-auto')
-                right_button.on('click', lambda: self.next_card())
+                right_button.on('click', js_handler='() => window.cardSlider.step(1)')
             
-            # Indicators
+            # Indicators (or a position counter for large decks)
             with ui.element('div').classes('absolute bottom-8 left-1/2 transform -translate-x-1/2 flex space-x-3'):
-                for i in range(len(self.cards)):
-                    indicator = ui.element('div').classes('w-3 h-3 rounded-full bg-white/50 indicator')
-                    self.indicators.append(indicator)
-                    
-                    # Add click handler for each indicator
-                    def make_indicator_handler(index):
-                        return lambda: self.go_to_card(index)
-                    
-                    indicator.on('click', make_indicator_handler(i))
-
-        # Set initial active indicator
-        self.indicators[0].classes('bg-white', remove='bg-white/50')
-
-        # Keyboard navigation
-        def handle_keydown(e):
-            if e.args.get('key') == 'ArrowLeft':
-                self.prev_card()
-            elif e.args.get('key') == 'ArrowRight':
-                self.next_card()
-
-        ui.on('keydown', handle_keydown)
-
-        # Add mouse wheel support
-        ui.add_head_html('''
-        <script>
-            document.addEventListener('wheel', function(e) {
-                if (e.deltaY > 0) {
-                    // Scroll down = next card
-                    document.dispatchEvent(new KeyboardEvent('keydown', {key: 'ArrowRight'}));
-                } else if (e.deltaY < 0) {
-                    // Scroll up = previous card  
-                    document.dispatchEvent(new KeyboardEvent('keydown', {key: 'ArrowLeft'}));
-                }
-            });
-        </script>
+                if total <= MAX_INDICATORS:
+                    for i in range(total):
+                        indicator = ui.element('div').classes('w-3 h-3 rounded-full bg-white/50 indicator')
+                        indicator.on('click', js_handler=f'() => window.cardSlider.go({i})')
+                        self.indicators.append(indicator)
+                    self.indicators[self.current_index].classes('bg-white', remove='bg-white/50')
+                else:
+                    self.counter = ui.label(f'{self.current_index + 1} / {total}').classes('text-white text-lg font-semibold')
+
+        # Navigation runs in the browser; only the settled index is reported back
+        on_once('slider_index', self.handle_index_event)
+        on_once('slider_page', self.handle_page_event)
+        spawn(self.load_initial_pages(), key='slider pages')
+
+    async def load_initial_pages(self):
+        """Fetch the cards around the current one like handle_page_event does, then start the browser controller"""
+        pages = {}
+        for index in (self.current_index - 1, self.current_index, self.current_index + 1):
+            page = (index % self.total) // self.page_size
+            if page not in pages:
+                cards = await run.io_bound(self.fetch_page, page)
+                if cards is None:  # cancelled or shutting down
+                    return
+                pages[page] = cards
+        if self.slider_container is None or self.slider_container.is_deleted:
+            return
+        self.setup_client_navigation(pages)
+
+    def setup_client_navigation(self, pages):
+        """Install the browser-side controller for buttons, indicators, keys and the mouse wheel"""
+        config = {
+            'current': self.current_index,
+            'total': self.total,
+            'pageSize': self.page_size,
+            'pages': pages,
+            'track': self.slider_container.id,
+            'slots': [{key: element.id for key, element in slot.items()} for slot in self.slots],
+            'indicators': [indicator.id for indicator in self.indicators],
+            'counter': self.counter.id if self.counter else None,
+        }
+        ui.run_javascript(f'''
+            window.cardSlider?.dispose();
+            window.cardSlider = {{
+                ...{json.dumps(config)},
+                requested: new Set(),
+                pending: null,
+                animating: false,
+                wheelDelta: 0,
+                wheelLocked: false,
+                wheelTimer: null,
+                reportTimer: null,
+                wrap(index) {{
+                    return ((index % this.total) + this.total) % this.total;
+                }},
+                pageOf(index) {{
+                    return Math.floor(this.wrap(index) / this.pageSize);
+                }},
+                card(index) {{
+                    const i = this.wrap(index);
+                    return this.pages[this.pageOf(i)]?.[i % this.pageSize];
+                }},
+                ensure(index) {{
+                    // Request the page holding this card if it is neither cached nor in flight
+                    const page = this.pageOf(index);
+                    if (page in this.pages || this.requested.has(page)) return;
+                    this.requested.add(page);
+                    emitEvent('slider_page', page);
+                }},
+                ready(index) {{
+                    return [-1, 0, 1].every(d => this.card(index + d));
+                }},
+                addPage(page, cards) {{
+                    this.pages[page] = cards;
+                    this.requested.delete(page);
+                    if (this.pending !== null && this.ready(this.pending)) {{
+                        const target = this.pending;
+                        this.pending = null;
+                        this.go(target);
+                    }}
+                }},
+                prune() {{
+                    // Keep only the pages around the current card so memory stays bounded
+                    const keep = new Set([-this.pageSize, -1, 0, 1, this.pageSize].map(d => this.pageOf(this.current + d)));
+                    Object.keys(this.pages).forEach(page => {{ if (!keep.has(Number(page))) delete this.pages[page]; }});
+                }},
+                fill(slot, index) {{
+                    const card = this.card(index);
+                    const root = getHtmlElement(slot.root);
+                    if (!card || !root) return;
+                    if (root.dataset.color !== card.color) {{
+                        root.classList.remove(root.dataset.color);
+                        root.classList.add(card.color);
+                        root.dataset.color = card.color;
+                    }}
+                    ['icon', 'title', 'subtitle', 'content'].forEach(key => {{
+                        const element = getHtmlElement(slot[key]);
+                        if (element) element.textContent = card[key];
+                    }});
+                }},
+                render() {{
+                    this.slots.forEach((slot, i) => this.fill(slot, this.current + i - 1));
+                    this.indicators.forEach((id, i) => {{
+                        const indicator = getHtmlElement(id);
+                        indicator?.classList.toggle('bg-white', i === this.current);
+                        indicator?.classList.toggle('bg-white/50', i !== this.current);
+                    }});
+                    const counter = this.counter !== null && getHtmlElement(this.counter);
+                    if (counter) counter.textContent = `${{this.current + 1}} / ${{this.total}}`;
+                    this.prune();
+                    [-2, 2].forEach(d => this.ensure(this.current + d));
+                }},
+                recenter() {{
+                    const track = getHtmlElement(this.track);
+                    if (!track) return;
+                    track.style.transition = 'none';
+                    track.style.transform = 'translateX(-33.333%)';
+                    void track.offsetWidth;
+                    track.style.transition = '';
+                }},
+                go(index, report = true) {{
+                    const target = this.wrap(index);
+                    if (!this.ready(target)) {{
+                        [-1, 0, 1].forEach(d => this.ensure(target + d));
+                        this.pending = target;
+                        return;
+                    }}
+                    this.current = target;
+                    this.recenter();
+                    this.render();
+                    if (report) this.report();
+                }},
+                step(delta) {{
+                    const target = this.wrap(this.current + delta);
+                    if (this.animating) return;
+                    if (!this.ready(target)) return this.go(target);
+                    // Slide to the neighbouring slot, then recycle the slots around the new card
+                    const track = getHtmlElement(this.track);
+                    if (track) track.style.transform = `translateX(${{delta > 0 ? -66.667 : 0}}%)`;
+                    this.animating = true;
+                    setTimeout(() => {{
+                        this.animating = false;
+                        this.go(target);
+                    }}, 300);
+                }},
+                report() {{
+                    // Only the index the user settles on goes to the server
+                    clearTimeout(this.reportTimer);
+                    this.reportTimer = setTimeout(() => emitEvent('slider_index', this.current), 300);
+                }},
+                attached() {{
+                    // The listeners sit on document: drop them once the slider has left the page
+                    const track = getHtmlElement(this.track);
+                    if (!track) this.dispose();
+                    return track;
+                }},
+                onWheel(e) {{
+                    const track = this.attached();
+                    if (!track || !track.parentElement.contains(e.target)) return;
+                    // Coalesce a trackpad/wheel gesture into a single step
+                    clearTimeout(this.wheelTimer);
+                    this.wheelTimer = setTimeout(() => {{ this.wheelDelta = 0; this.wheelLocked = false; }}, 150);
+                    if (this.wheelLocked) return;
+                    this.wheelDelta += e.deltaY;
+                    if (Math.abs(this.wheelDelta) < 40) return;
+                    this.step(this.wheelDelta > 0 ? 1 : -1);
+                    this.wheelLocked = true;
+                }},
+                onKey(e) {{
+                    if (!this.attached() || e.target.closest?.('input, textarea, select, [contenteditable]')) return;
+                    if (e.key === 'ArrowLeft') this.step(-1);
+                    else if (e.key === 'ArrowRight') this.step(1);
+                }},
+                dispose() {{
+                    document.removeEventListener('wheel', this.wheelListener);
+                    document.removeEventListener('keydown', this.keyListener);
+                }},
+            }};
+            window.cardSlider.wheelListener = (e) => window.cardSlider.onWheel(e);
+            window.cardSlider.keyListener = (e) => window.cardSlider.onKey(e);
+            document.addEventListener('wheel', window.cardSlider.wheelListener, {{passive: true}});
+            document.addEventListener('keydown', window.cardSlider.keyListener);
+            window.cardSlider.render();
         ''')
 
 # Create the slider instance
@@ -177,4 +415,4 @@ slider = CardSlider()
 # Run the app
 if __name__ in {"__main__", "__mp_main__"}:
     slider.create_ui()
-    ui.run(title='3-Card Slider', port=8080, show=True)
\ No newline at end of file
+    ui.run(title='Card Slider', port=8080, show=True)
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Suggested prompts ranked against the running conversation.
+Each step has a bank of prompts whose vectors are computed once per process. Every message folds
+into a decaying conversation vector and raises the "already said" level of the prompts it
+resembles; ranking is then one matrix-vector product (relevance) minus a novelty penalty that
+grows with the square of that level, so touching a topic costs little and repeating a prompt a lot.
+"""
+
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+
+from vectors import embed, embed_many
+
+DECAY = 0.7  # weight the conversation vector keeps per message, so recent messages lead
+USER_WEIGHT = 1.0
+AGENT_WEIGHT = 0.5
+NOVELTY = 1.5  # penalty for prompts that were (nearly) said already
+
+# Asked in addition to each step's own questions, which stay first while the conversation is empty
+PROMPT_BANK = {
+    'Empathize': [
+        'Who are our primary users?', 'What does a typical day look like for them?',
+        'Where do they get stuck or give up?', 'What workarounds do they use today?',
+        'What do they say versus what they do?', 'Which moments make them anxious or frustrated?',
+        'What would delight them?',
+    ],
+    'Define': [
+        'Can we write this as a point-of-view statement?', 'What need is behind the complaint?',
+        'Which user group feels this most?', 'What happens if we do nothing?',
+        'How might we frame this as an opportunity?', 'What is out of scope?',
+    ],
+    'Ideate': [
+        'What would the opposite solution look like?', 'How would a competitor from another industry solve it?',
+        'What if we had no budget?', 'What if it had to work offline?', 'Which ideas can we combine?',
+        'What is the boldest idea on the board?',
+    ],
+    'Research': [
+        'Which assumption is riskiest?', 'What do interviews tell us?', 'What does the usage data show?',
+        'Which market segments are growing?', 'Where are competitors weak?', 'What do experts say?',
+    ],
+    'Prototype': [
+        'Can we sketch it on paper first?', 'What must the prototype answer?', 'Which flow should we mock up?',
+        'Can we fake the backend?', 'How long should building it take?', 'Who builds which part?',
+    ],
+    'Test': [
+        'Who should we test with?', 'What task will testers try?', 'Where did testers hesitate?',
+        'What surprised us in the sessions?', 'How many testers completed the task?',
+        'What feedback came up repeatedly?',
+    ],
+    'Implement': [
+        'Who owns the launch?', 'What are the milestones?', 'Which risks could delay us?',
+        'How do we train support?', 'What does the pilot group look like?', 'Which metrics go on the dashboard?',
+    ],
+    'Learn': [
+        'Which assumptions held up?', 'What would we tell another team?', 'What slowed us down?',
+        'Which metric moved the most?', 'What did users value most?', 'What should we stop doing?',
+    ],
+    'Iterate': [
+        'Which feedback should we act on first?', 'What is the smallest useful change?',
+        'What can we remove?', 'How do we know the change helped?', 'What goes into the next sprint?',
+        'Which experiment comes next?',
+    ],
+    'Scale': [
+        'What breaks at ten times the users?', 'What can we automate?', 'Which markets come next?',
+        'How do we onboard new teams?', 'What does support look like at scale?', 'What will it cost to grow?',
+    ],
+}
+
+
+@lru_cache(maxsize=None)
+def prompt_matrix(prompts: Tuple[str, ...]) -> np.ndarray:
+    """Vectors of a step's prompt bank, one row each; computed once per process"""
+    return embed_many(prompts)
+
+
+class PromptRanker:
+    """Per-step conversation vectors and the prompt ranking derived from them"""
+
+    def __init__(self, steps, shown: int = 3):
+        self.shown = shown
+        self.banks = [tuple(step.questions) + tuple(PROMPT_BANK.get(step.name, ())) for step in steps]
+        self.matrices = [prompt_matrix(bank) for bank in self.banks]
+        self.conversation = [np.zeros(matrix.shape[1], dtype=np.float32) for matrix in self.matrices]
+        self.said = [np.zeros(len(bank), dtype=np.float32) for bank in self.banks]
+
+    def observe(self, step_index: int, text: str, user: bool = True):
+        vector = embed(text) * (USER_WEIGHT if user else AGENT_WEIGHT)
+        conversation = self.conversation[step_index]
+        conversation *= DECAY
+        conversation += vector
+        np.maximum(self.said[step_index], self.matrices[step_index] @ vector, out=self.said[step_index])
+
+    def top(self, step_index: int) -> List[str]:
+        """The most relevant prompts the user has not asked yet, best first"""
+        conversation = self.conversation[step_index]
+        norm = np.linalg.norm(conversation)
+        scores = self.matrices[step_index] @ (conversation / norm if norm else conversation)
+        scores -= NOVELTY * self.said[step_index] ** 2
+        order = np.argsort(-scores, kind='stable')[:self.shown]
+        return [self.banks[step_index][i] for i in order]
@@ -0,0 +1,112 @@
+"""
+Per-client ownership of UI-spawned coroutines.
+Tasks started under a key supersede (cancel) the previous task with that key, failures are counted
+and reported, and everything still running is cancelled when the client goes away.
+"""
+
+import asyncio
+import weakref
+from typing import Coroutine, Dict, Optional, Set
+
+from nicegui import app, background_tasks, context
+from nicegui.client import Client
+
+from metrics import metrics
+
+TOTALS = {'started': 0, 'superseded': 0, 'cancelled': 0, 'failed': 0}
+
+
+async def in_slot(slot, coro: Coroutine):
+    """Await a coroutine inside the UI slot it was spawned from, like a NiceGUI event handler"""
+    with slot:
+        return await coro
+
+
+class TaskSupervisor:
+    def __init__(self, name: str = ''):
+        self.name = name
+        self.tasks: Set[asyncio.Task] = set()
+        self.keyed: Dict[str, asyncio.Task] = {}
+
+    def spawn(self, coro: Coroutine, key: Optional[str] = None) -> asyncio.Task:
+        """Run a coroutine owned by this supervisor; a task with the same key is cancelled first"""
+        if key is not None:
+            previous = self.keyed.get(key)
+            if previous is not None and not previous.done():
+                previous.cancel()
+                TOTALS['superseded'] += 1
+        name = f'{self.name}:{key or getattr(coro, "__qualname__", "task")}'
+        try:
+            slot = context.slot
+        except RuntimeError:  # spawned outside of any UI context
+            slot = None
+        task = background_tasks.create(in_slot(slot, coro) if slot else coro, name=name)
+        self.tasks.add(task)
+        if key is not None:
+            self.keyed[key] = task
+        task.add_done_callback(lambda t: self.finished(t, key, coro))
+        TOTALS['started'] += 1
+        return task
+
+    def finished(self, task: asyncio.Task, key: Optional[str], coro: Coroutine):
+        self.tasks.discard(task)
+        if task.cancelled():
+            coro.close()  # a task cancelled before it ever ran would otherwise warn about a never-awaited coroutine
+        if key is not None and self.keyed.get(key) is task:
+            del self.keyed[key]
+        if not task.cancelled() and task.exception() is not None:
+            TOTALS['failed'] += 1  # the exception itself is reported by background_tasks
+
+    def cancel_all(self) -> int:
+        pending = [task for task in self.tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        TOTALS['cancelled'] += len(pending)
+        return len(pending)
+
+    @property
+    def running(self) -> int:
+        return sum(1 for task in self.tasks if not task.done())
+
+
+_supervisors = weakref.WeakKeyDictionary()
+
+
+def supervisor_for(client: Optional[Client] = None) -> TaskSupervisor:
+    client = client or context.client
+    supervisor = _supervisors.get(client)
+    if supervisor is None:
+        supervisor = _supervisors[client] = TaskSupervisor(client.id[:8])
+    return supervisor
+
+
+def spawn(coro: Coroutine, key: Optional[str] = None) -> asyncio.Task:
+    """Run a coroutine owned by the current client's supervisor"""
+    return supervisor_for().spawn(coro, key)
+
+
+def cancel_client_tasks(client: Client):
+    supervisor = _supervisors.pop(client, None)
+    if supervisor:
+        supervisor.cancel_all()
+
+
+def stats() -> Dict[str, int]:
+    return {'running': sum(supervisor.running for supervisor in list(_supervisors.values())), **TOTALS}
+
+
+def collect():
+    counts = stats()
+    yield '# HELP app_ui_tasks_running Coroutines spawned by UI handlers that are still running'
+    yield '# TYPE app_ui_tasks_running gauge'
+    yield f'app_ui_tasks_running {counts.pop("running")}'
+    yield '# HELP app_ui_tasks_total UI-spawned coroutines by outcome'
+    yield '# TYPE app_ui_tasks_total counter'
+    for outcome, value in counts.items():
+        yield f'app_ui_tasks_total{{outcome="{outcome}"}} {value}'
+
+
+def install():
+    """Cancel a client's tasks once it is gone for good and report task counts"""
+    app.on_delete(cancel_client_tasks)
+    metrics.add_collector(collect)
@@ -0,0 +1,47 @@
+"""
+Hashing text vectorizer shared by the design thinking features that compare texts.
+Words and their character trigrams are hashed (crc32, stable across processes) into a fixed
+number of signed dimensions, so no vocabulary has to be fitted or kept; vectors are L2-normalised
+and the dot product of two of them is their cosine similarity.
+"""
+
+import zlib
+from functools import lru_cache
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from prompts import terms
+
+DIMENSIONS = 2 ** 12
+TRIGRAM_WEIGHT = 0.3  # trigrams match inflections (struggle / struggling) without outvoting whole words
+
+
+@lru_cache(maxsize=65536)
+def word_features(word: str) -> Tuple[Tuple[int, float], ...]:
+    """Hashed (dimension, signed weight) features of one word"""
+    padded = f' {word} '
+    grams = [(word, 1.0)] + [(padded[i:i + 3], TRIGRAM_WEIGHT) for i in range(len(padded) - 2)]
+    features = []
+    for gram, weight in grams:
+        h = zlib.crc32(gram.encode())
+        features.append((h % DIMENSIONS, weight if h & 0x80000000 else -weight))
+    return tuple(features)
+
+
+def embed(text: str) -> np.ndarray:
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for word in terms(text):
+        for dimension, weight in word_features(word):
+            vector[dimension] += weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def embed_many(texts: Sequence[str]) -> np.ndarray:
+    """One row per text"""
+    matrix = np.zeros((len(texts), DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        matrix[row] = embed(text)
+    return matrix
+